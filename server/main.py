@@ -9,11 +9,15 @@ Handles:
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, Dict
 import uuid
 import os
+import logging
+import logging.handlers
+import orjson
+import queue
 import uvicorn
 from datetime import datetime
 from dotenv import load_dotenv
@@ -24,6 +28,17 @@ from services.orchestrator import MusicGenerationOrchestrator
 # Load environment variables
 load_dotenv()
 
+# Route service loggers to stdout alongside the existing print output. Records go
+# through a queue to a listener thread, so a slow stdout never blocks the event loop.
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(message)s"))
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    handlers=[logging.handlers.QueueHandler(log_queue)]
+)
+
 # Store WebSocket clients
 clients: Dict[str, WebSocket] = {}
 
@@ -37,6 +52,7 @@ async def lifespan(app: FastAPI):
     global orchestrator
     
     # Startup
+    log_listener.start()
     print("=" * 60)
     print("Gemini Lyria Showcase - Backend Server")
     print("=" * 60)
@@ -60,6 +76,7 @@ async def lifespan(app: FastAPI):
     if orchestrator:
         await orchestrator.shutdown()
     print("[Server] Shutdown complete")
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -136,7 +153,8 @@ async def health_check():
         "timestamp": str(datetime.now()),
         "services": {
             "orchestrator": orchestrator.is_initialized if orchestrator else False,
-            "lyria_pool": orchestrator.lyria_pool.get_stats() if orchestrator else None
+            "lyria_pool": orchestrator.lyria_pool.get_stats() if orchestrator else None,
+            "gemini_delta_cache": orchestrator.gemini_analyzer.get_cache_stats() if orchestrator else None
         }
     }
 
@@ -233,22 +251,23 @@ async def download_audio(request: DownloadRequest):
     try:
         print(f"[API] Download request for session: {request.session_id}")
         
-        # Export audio as WAV
-        wav_data = orchestrator.export_audio_as_wav(request.session_id)
+        # Export audio as WAV (header + PCM chunks, streamed without joining)
+        wav_parts = orchestrator.export_audio_as_wav(request.session_id)
+        wav_size = sum(map(len, wav_parts))
         
         # Generate filename with session ID and timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"gemini_music_{request.session_id[:8]}_{timestamp}.wav"
         
-        print(f"[API] Sending WAV file: {filename} ({len(wav_data)} bytes)")
+        print(f"[API] Sending WAV file: {filename} ({wav_size} bytes)")
         
-        # Return WAV file with proper headers
-        return Response(
-            content=wav_data,
+        # Stream WAV file with proper headers
+        return StreamingResponse(
+            iter(wav_parts),
             media_type="audio/wav",
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(len(wav_data))
+                "Content-Length": str(wav_size)
             }
         )
         
@@ -270,6 +289,14 @@ async def get_session_status(session_id: str):
 # WebSocket Handler
 # ============================================================================
 
+async def send_message(websocket: WebSocket, message: dict):
+    """
+    Send a JSON control message as a text frame (binary frames carry audio).
+    orjson serializes several times faster than the stdlib json send_json uses.
+    """
+    await websocket.send_text(orjson.dumps(message).decode())
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -287,7 +314,7 @@ async def websocket_endpoint(websocket: WebSocket):
     clients[session_id] = websocket
     
     # Send session ID to client
-    await websocket.send_json({
+    await send_message(websocket, {
         "type": "session",
         "session_id": session_id
     })
@@ -295,16 +322,16 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             # Receive messages from client
-            data = await websocket.receive_json()
+            data = orjson.loads(await websocket.receive_text())
             
             message_type = data.get("type")
             
             if message_type == "ping":
-                await websocket.send_json({"type": "pong"})
+                await send_message(websocket, {"type": "pong"})
                 
             elif message_type == "prompt":
                 await orchestrator.handle_user_prompt(session_id, data["prompt"])
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "prompt_received",
                     "prompt": data["prompt"]
                 })
@@ -313,7 +340,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 # Handle video scrubbing/seeking
                 offset = data.get("offset", 0)
                 result = await orchestrator.update_playback_offset(session_id, offset)
-                await websocket.send_json({
+                await send_message(websocket, {
                     "type": "seek_confirmed",
                     "offset": offset,
                     "result": result
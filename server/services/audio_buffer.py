@@ -0,0 +1,59 @@
+"""
+PCMSlabBuffer - Compact storage for a session's generated audio
+
+Lyria streams PCM in many small chunks. Keeping each one as its own bytes
+object costs per-object overhead and leaves export iterating tens of
+thousands of tiny buffers, so chunks are coalesced into ~1 MB slabs instead.
+An optional byte cap rolls the oldest slabs out so long sessions can't grow
+memory without bound.
+"""
+
+from collections import deque
+from typing import Deque, List, Optional
+
+
+class PCMSlabBuffer:
+    """Append-only PCM buffer that coalesces small chunks into large slabs."""
+    
+    def __init__(self, slab_size: int = 1 << 20, max_bytes: Optional[int] = None):
+        self.slab_size = slab_size
+        self.max_bytes = max_bytes  # None = unbounded
+        self.slabs: Deque[bytes] = deque()  # Sealed, immutable slabs
+        self.current = bytearray()  # Slab currently being filled
+        self._sealed_bytes = 0
+        self.dropped_bytes = 0  # Audio rolled out by the byte cap
+    
+    def append(self, audio_data: bytes) -> None:
+        """Append a PCM chunk, sealing the current slab first if it would overflow."""
+        if self.current and len(self.current) + len(audio_data) > self.slab_size:
+            self.slabs.append(bytes(self.current))
+            self._sealed_bytes += len(self.current)
+            self.current = bytearray()
+            
+            # Over the cap: roll the oldest sealed slabs out
+            while self.slabs and self.max_bytes is not None and self._sealed_bytes + self.slab_size > self.max_bytes:
+                oldest = self.slabs.popleft()
+                self._sealed_bytes -= len(oldest)
+                self.dropped_bytes += len(oldest)
+        
+        self.current.extend(audio_data)
+    
+    def snapshot(self) -> List[bytes]:
+        """
+        Get the buffered audio as a list of slabs.
+        
+        Sealed slabs are shared as-is; only the partially filled slab is copied,
+        so the snapshot stays consistent while new audio keeps arriving.
+        """
+        if not self.current:
+            return list(self.slabs)
+        return [*self.slabs, bytes(self.current)]
+    
+    @property
+    def nbytes(self) -> int:
+        """Total number of PCM bytes buffered."""
+        return self._sealed_bytes + len(self.current)
+    
+    def __len__(self) -> int:
+        """Number of slabs (including the one being filled)."""
+        return len(self.slabs) + (1 if self.current else 0)
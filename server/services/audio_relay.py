@@ -0,0 +1,141 @@
+"""
+AudioRelay - Forwards a session's Lyria audio to its client WebSocket
+
+Lyria delivers audio in many small chunks. Sending each as its own WebSocket
+frame costs a socket write and frame header per chunk, so the relay buffers
+chunks and flushes them as one frame every AUDIO_FLUSH_SECONDS or once
+AUDIO_BATCH_BYTES have accumulated. A slow client gets backpressure (Lyria
+delivery is paused) and, if it still can't keep up, the oldest audio is dropped.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Optional
+
+from services.audio_buffer import PCMSlabBuffer
+
+
+logger = logging.getLogger(__name__)
+
+# Small Lyria chunks are coalesced into client frames of at least this many bytes...
+AUDIO_BATCH_BYTES = 16384
+# ...or whatever has arrived within this window, so batching adds bounded latency
+# (both overridable via AUDIO_BATCH_BYTES / AUDIO_BATCH_MS)
+AUDIO_FLUSH_SECONDS = 0.04
+# Chunks allowed to wait for a slow client before the oldest ones are dropped
+AUDIO_QUEUE_MAX_CHUNKS = 200
+# Pause Lyria delivery when the client falls this far behind, resume once drained
+AUDIO_QUEUE_HIGH_WATERMARK = 150
+AUDIO_QUEUE_LOW_WATERMARK = 50
+
+
+class AudioRelay:
+    """Relays one session's Lyria audio to its client in coalesced frames."""
+    
+    def __init__(
+        self,
+        client_websocket: Any,
+        lyria_connection: Any,
+        buffer: PCMSlabBuffer,
+        on_first_audio: Optional[Callable[[], None]] = None
+    ):
+        self.client_websocket = client_websocket
+        self.lyria_connection = lyria_connection
+        self.buffer = buffer  # Every chunk is also kept here for download
+        self.on_first_audio = on_first_audio
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_CHUNKS)
+        self.dropped_chunks = 0
+        self.batch_bytes = int(os.getenv("AUDIO_BATCH_BYTES", str(AUDIO_BATCH_BYTES)))
+        self.flush_seconds = float(os.getenv("AUDIO_BATCH_MS", str(AUDIO_FLUSH_SECONDS * 1000))) / 1000
+        self._first_audio_received = False
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: list = []  # Chunks taken off the queue for the frame being built
+        self._closed = False
+    
+    def start(self, name: Optional[str] = None) -> None:
+        """Start the background sender."""
+        self._task = asyncio.create_task(self._run(), name=name)
+    
+    async def on_audio_data(self, audio_data: bytes) -> None:
+        """Lyria audio callback: store the chunk and queue it for the client (never blocks)."""
+        try:
+            if not self._first_audio_received:
+                self._first_audio_received = True
+                if self.on_first_audio:
+                    self.on_first_audio()
+            
+            self.buffer.append(audio_data)
+            
+            try:
+                self.queue.put_nowait(audio_data)
+            except asyncio.QueueFull:
+                # Client is too far behind - drop the oldest chunk to stay current
+                self.queue.get_nowait()
+                self.queue.put_nowait(audio_data)
+                self.dropped_chunks += 1
+                if self.dropped_chunks % 100 == 1:
+                    logger.warning("[AudioRelay] ⚠️  Client falling behind, dropped %s audio chunks", self.dropped_chunks)
+            
+            # Stop pulling from Lyria until the sender catches up
+            if self.queue.qsize() >= AUDIO_QUEUE_HIGH_WATERMARK:
+                self.lyria_connection.pause_audio()
+        except Exception as e:
+            logger.error("[AudioRelay] Error relaying audio: %s", e)
+    
+    async def _run(self):
+        """Send queued audio in frames of up to batch_bytes, waiting at most flush_seconds for more."""
+        loop = asyncio.get_running_loop()
+        queue = self.queue
+        batch_bytes = self.batch_bytes
+        flush_seconds = self.flush_seconds
+        
+        # Checked as well as cancelling: before Python 3.12, wait_for can swallow a
+        # cancel that lands just as a chunk arrives
+        while not self._closed:
+            chunks = self._collecting = [await queue.get()]
+            batch_size = len(chunks[0])
+            deadline = loop.time() + flush_seconds
+            
+            while batch_size < batch_bytes:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        chunk = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    chunk = queue.get_nowait()
+                
+                chunks.append(chunk)
+                batch_size += len(chunk)
+            
+            if queue.qsize() <= AUDIO_QUEUE_LOW_WATERMARK:
+                self.lyria_connection.resume_audio()
+            
+            self._collecting = []
+            await self._send(chunks)
+    
+    async def _send(self, chunks: list) -> None:
+        """Send chunks to the client as a single WebSocket frame."""
+        try:
+            await self.client_websocket.send_bytes(chunks[0] if len(chunks) == 1 else b''.join(chunks))
+        except Exception as e:
+            logger.error("[AudioRelay] Error relaying audio: %s", e)
+    
+    async def close(self) -> None:
+        """Stop the sender and flush whatever audio is still queued."""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        
+        # Audio the sender had already taken off the queue goes out first
+        chunks, self._collecting = self._collecting, []
+        while not self.queue.empty():
+            chunks.append(self.queue.get_nowait())
+        if chunks:
+            await self._send(chunks)
@@ -11,18 +11,96 @@ CRITICAL DEPENDENCY: Requires yt-dlp >= 2025.10.22 for YouTube nsig decryption.
 Older versions will fail with 403 Forbidden errors on many videos.
 """
 
+import asyncio
+import functools
+import logging
 import cv2
 import numpy as np
 from PIL import Image
 import io
 import os
+import shutil
 import tempfile
 import subprocess
+import time
 import imageio_ffmpeg
 import yt_dlp
-from typing import Optional, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime
-from skimage.metrics import structural_similarity as ssim
+
+
+logger = logging.getLogger(__name__)
+
+# Frame work is run from several sessions' worker threads at once, on 64x64
+# images; OpenCV's own thread pool would only oversubscribe the CPUs
+cv2.setNumThreads(1)
+
+# Frames are compared as small grayscale images - plenty for scene-cut detection
+COMPARE_SIZE = (64, 64)
+
+# Worker threads for blocking yt-dlp/ffmpeg calls; bounded so a burst of sessions
+# can't spawn unlimited concurrent ffmpeg processes
+FRAME_WORKERS = min(4, os.cpu_count() or 1)
+
+# How long a resolved livestream URL is reused before asking yt-dlp again
+LIVESTREAM_URL_TTL_SECONDS = 300
+
+# How long a resolved direct stream URL for a recorded video is reused across
+# frames and sessions (YouTube's signed URLs stay valid for hours)
+STREAM_URL_TTL_SECONDS = 1800
+STREAM_URL_CACHE_SIZE = 64
+
+# Video info lookups are reused across sessions for the same URL
+VIDEO_INFO_TTL_SECONDS = 600
+VIDEO_INFO_CACHE_SIZE = 128
+
+
+# SSIM constants (same as skimage.metrics.structural_similarity defaults for uint8)
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+
+def ssim(img1: np.ndarray, img2: np.ndarray) -> float:
+    """
+    Mean structural similarity of two equally sized grayscale images.
+    
+    Matches skimage's structural_similarity (7x7 uniform window, sample
+    covariance, borders cropped), but computes the local statistics with
+    OpenCV box filters in one pass each instead of skimage's generic
+    ndimage path - this runs for every polled frame.
+    """
+    x = img1.astype(np.float64)
+    y = img2.astype(np.float64)
+    window = (SSIM_WINDOW, SSIM_WINDOW)
+    
+    ux = cv2.blur(x, window)
+    uy = cv2.blur(y, window)
+    uxx = cv2.blur(x * x, window)
+    uyy = cv2.blur(y * y, window)
+    uxy = cv2.blur(x * y, window)
+    
+    n = SSIM_WINDOW * SSIM_WINDOW
+    cov_norm = n / (n - 1)
+    vx = cov_norm * (uxx - ux * ux)
+    vy = cov_norm * (uyy - uy * uy)
+    vxy = cov_norm * (uxy - ux * uy)
+    
+    s = ((2 * ux * uy + SSIM_C1) * (2 * vxy + SSIM_C2)) / (
+        (ux * ux + uy * uy + SSIM_C1) * (vx + vy + SSIM_C2)
+    )
+    
+    # Border pixels see a padded window; ignore them like skimage does
+    pad = (SSIM_WINDOW - 1) // 2
+    return float(s[pad:-pad, pad:-pad].mean())
+
+
+async def _iter_async(items: Iterable):
+    """Adapt a plain iterable to an async iterator."""
+    for item in items:
+        yield item
 
 
 def resolve_ffmpeg_path() -> str:
@@ -39,20 +117,28 @@ class FrameExtractor:
     def __init__(
         self,
         frame_diff_threshold: float = None,
+        frame_diff_low: float = None,
         frame_interval: int = None,
         livestream_interval: int = None
     ):
+        # Upper band: drift from the last analyzed frame needed to re-run Gemini
         self.frame_diff_threshold = frame_diff_threshold or float(
             os.getenv("FRAME_DIFF_THRESHOLD", "0.20")
         )
+        # Lower band: drift from the last analyzed frame below this is treated as noise
+        self.frame_diff_low = frame_diff_low or float(
+            os.getenv("FRAME_DIFF_LOW", str(self.frame_diff_threshold / 2))
+        )
         self.frame_interval = frame_interval or int(
             os.getenv("FRAME_INTERVAL_SECONDS", "5")
         )
         self.livestream_interval = livestream_interval or int(
             os.getenv("LIVESTREAM_SNAPSHOT_INTERVAL", "5")
         )
+        # By default seeks land on the keyframe at/before the timestamp instead of
+        # decoding forward to the exact frame (at most one GOP early, far cheaper)
+        self.accurate_seek = os.getenv("FRAME_ACCURATE_SEEK", "false").lower() == "true"
         
-        self.last_frame: Optional[np.ndarray] = None
         self.temp_dir = tempfile.mkdtemp(prefix="gemini_showcase_")
         
         # Create screenshots directory for saving processed frames
@@ -62,43 +148,156 @@ class FrameExtractor:
         # Get FFmpeg from imageio-ffmpeg package
         self.ffmpeg_path = resolve_ffmpeg_path()
         
-        print(f"[FrameExtractor] Initialized with temp directory: {self.temp_dir}")
-        print(f"[FrameExtractor] Screenshots will be saved to: {self.screenshots_dir}")
-        print(f"[FrameExtractor] Using FFmpeg: {self.ffmpeg_path}")
+        # yt-dlp and ffmpeg block; run them here instead of on the event loop
+        # (threads suffice - ffmpeg does its decoding in a separate process)
+        self._executor = ThreadPoolExecutor(max_workers=FRAME_WORKERS, thread_name_prefix="frame-extractor")
+        
+        # Livestream URL -> (expiry on time.monotonic(), ffmpeg input args)
+        self._livestream_sources: Dict[str, Tuple[float, List[str]]] = {}
+        
+        # Recorded video URL -> (expiry on time.monotonic(), direct stream URL), oldest first
+        self._stream_urls: OrderedDict[str, Tuple[float, str]] = OrderedDict()
+        
+        # Video URL -> (expiry on time.monotonic(), lookup task), oldest first
+        self._video_info: OrderedDict[str, Tuple[float, asyncio.Future]] = OrderedDict()
+        
+        logger.info("[FrameExtractor] Initialized with temp directory: %s", self.temp_dir)
+        logger.info("[FrameExtractor] Screenshots will be saved to: %s", self.screenshots_dir)
+        logger.info("[FrameExtractor] Using FFmpeg: %s", self.ffmpeg_path)
     
     async def initialize(self):
         """Initialize frame extractor."""
         os.makedirs(self.temp_dir, exist_ok=True)
-        print(f"[FrameExtractor] Ready to extract frames")
+        logger.info("[FrameExtractor] Ready to extract frames")
+    
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking call (yt-dlp, ffmpeg) on the extractor's worker threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    @staticmethod
+    def _extract_info(video_url: str, ydl_opts: dict) -> dict:
+        """Fetch video info with yt-dlp (blocking, network-bound)."""
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return ydl.extract_info(video_url, download=False)
+    
+    @staticmethod
+    def _download_clip(video_url: str, ydl_opts: dict) -> str:
+        """Download a clip with yt-dlp (blocking) and return the local file path."""
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(video_url, download=True)
+            return ydl.prepare_filename(info)
     
     async def extract_frame(self, video_url: str, timestamp_seconds: float = 0) -> bytes:
         """Extract a single frame from a YouTube video at a specific timestamp."""
         try:
-            print(f"[FrameExtractor] Extracting frame from {video_url} at {timestamp_seconds}s")
+            logger.debug("[FrameExtractor] Extracting frame from %s at %ss", video_url, timestamp_seconds)
             
             # Try direct stream first (fast, no download)
-            stream_url = self._get_safe_stream_url(video_url)
-            
-            if stream_url:
-                try:
-                    frame_bytes = await self._extract_frame_direct(stream_url, timestamp_seconds)
-                    print(f"[FrameExtractor] ✅ Direct stream succeeded")
-                    await self._save_screenshot(frame_bytes, f"recorded_{int(timestamp_seconds)}s", video_url)
-                    return frame_bytes
-                except Exception as e:
-                    print(f"[FrameExtractor] ⚠️ Direct stream failed: {e}")
-                    print(f"[FrameExtractor] Falling back to clip download...")
-            
-            # Fallback: download short clip around timestamp
-            frame_bytes = await self._extract_frame_fallback(video_url, timestamp_seconds)
-            print(f"[FrameExtractor] ✅ Fallback succeeded")
-            await self._save_screenshot(frame_bytes, f"recorded_{int(timestamp_seconds)}s", video_url)
+            stream_url = await self._resolve_stream_url(video_url)
+            frame_bytes, direct_ok = await self._extract_frame_at(video_url, stream_url, timestamp_seconds)
+            if not direct_ok:
+                self._stream_urls.pop(video_url, None)
             return frame_bytes
             
         except Exception as e:
-            print(f"[FrameExtractor] Error extracting frame: {e}")
+            logger.error("[FrameExtractor] Error extracting frame: %s", e)
             raise
     
+    async def extract_frames_batch(
+        self,
+        video_url: str,
+        timestamps: Union[Iterable[float], AsyncIterable[float]]
+    ) -> AsyncIterator[Tuple[float, bytes]]:
+        """
+        Extract frames at several timestamps, yielding (timestamp, frame_bytes).
+        
+        The direct stream URL is resolved once (or taken from the cache shared
+        with other sessions) and reused for every frame, instead of a full yt-dlp
+        lookup per frame. A list of timestamps is extracted in
+        sorted order; an async iterable is consumed lazily, one timestamp per frame
+        requested, so callers can pace or re-plan it (e.g. follow seeks). Frames
+        that fail to extract are logged and skipped.
+        """
+        if isinstance(timestamps, AsyncIterable):
+            schedule = timestamps
+        else:
+            schedule = _iter_async(sorted(timestamps))
+        
+        stream_url = None
+        resolved = False
+        
+        async for timestamp in schedule:
+            try:
+                logger.debug("[FrameExtractor] Extracting frame from %s at %ss", video_url, timestamp)
+                
+                if not resolved:
+                    stream_url = await self._resolve_stream_url(video_url)
+                    resolved = True
+                
+                frame_bytes, direct_ok = await self._extract_frame_at(video_url, stream_url, timestamp)
+                
+                # Stream URLs can expire mid-session; look it up again next time
+                if not direct_ok:
+                    self._stream_urls.pop(video_url, None)
+                    resolved = False
+                
+            except Exception as e:
+                logger.error("[FrameExtractor] Error extracting frame at %ss: %s", timestamp, e)
+                continue
+            
+            yield timestamp, frame_bytes
+    
+    async def _extract_frame_at(
+        self,
+        video_url: str,
+        stream_url: Optional[str],
+        timestamp_seconds: float
+    ) -> Tuple[bytes, bool]:
+        """
+        Extract one frame, trying the direct stream before the clip-download fallback.
+        Returns the frame and whether the direct stream worked.
+        """
+        if stream_url:
+            try:
+                frame_bytes = await self._extract_frame_direct(stream_url, timestamp_seconds)
+                logger.debug("[FrameExtractor] ✅ Direct stream succeeded")
+                await self._save_screenshot(frame_bytes, f"recorded_{int(timestamp_seconds)}s", video_url)
+                return frame_bytes, True
+            except Exception as e:
+                logger.warning("[FrameExtractor] ⚠️ Direct stream failed: %s", e)
+                logger.info("[FrameExtractor] Falling back to clip download...")
+        
+        # Fallback: download short clip around timestamp
+        frame_bytes = await self._extract_frame_fallback(video_url, timestamp_seconds)
+        logger.info("[FrameExtractor] ✅ Fallback succeeded")
+        await self._save_screenshot(frame_bytes, f"recorded_{int(timestamp_seconds)}s", video_url)
+        return frame_bytes, False
+    
+    async def _resolve_stream_url(self, video_url: str) -> Optional[str]:
+        """
+        Get the direct stream URL for a recorded video.
+        
+        Cached for STREAM_URL_TTL_SECONDS so repeat frame grabs and other sessions on
+        the same video skip the yt-dlp lookup. Callers drop the entry when the URL
+        stops working.
+        """
+        cached = self._stream_urls.get(video_url)
+        if cached and time.monotonic() < cached[0]:
+            self._stream_urls.move_to_end(video_url)
+            return cached[1]
+        
+        stream_url = await self._run_blocking(self._get_safe_stream_url, video_url)
+        
+        # Failed lookups aren't cached
+        if stream_url:
+            self._stream_urls[video_url] = (time.monotonic() + STREAM_URL_TTL_SECONDS, stream_url)
+            self._stream_urls.move_to_end(video_url)
+            if len(self._stream_urls) > STREAM_URL_CACHE_SIZE:
+                self._stream_urls.popitem(last=False)
+        
+        return stream_url
+    
     def _get_safe_stream_url(self, video_url: str) -> str:
         """
         Return a direct MP4 stream URL (no DASH/HLS)
@@ -111,8 +310,7 @@ class FrameExtractor:
         """
         try:
             ydl_opts = {"quiet": True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
+            info = self._extract_info(video_url, ydl_opts)
             
             formats = info.get("formats", [])
             
@@ -136,32 +334,38 @@ class FrameExtractor:
                 matching = [f for f in safe_formats if f.get("height") == target_height]
                 if matching:
                     best = matching[0]
-                    print(f"[FrameExtractor] 📺 Selected stream: {best.get('format_note', '?')} ({best.get('height')}p) [target: 720p]")
+                    logger.info("[FrameExtractor] 📺 Selected stream: %s (%sp) [target: 720p]", best.get('format_note', '?'), best.get('height'))
                     return best.get("url")
             
             # Fallback to highest resolution if no preferred resolutions available
             best = max(safe_formats, key=lambda f: f.get("height", 0))
-            print(f"[FrameExtractor] 📺 Selected stream: {best.get('format_note', '?')} ({best.get('height')}p) [fallback]")
+            logger.info("[FrameExtractor] 📺 Selected stream: %s (%sp) [fallback]", best.get('format_note', '?'), best.get('height'))
             return best.get("url")
             
         except Exception as e:
-            print(f"[FrameExtractor] Failed to get safe stream URL: {e}")
+            logger.warning("[FrameExtractor] Failed to get safe stream URL: %s", e)
             return None
     
     async def _extract_frame_direct(self, stream_url: str, timestamp: float) -> bytes:
         """Extract frame directly from stream URL (NO HEADERS - this is key!)."""
-        output_path = os.path.join(self.temp_dir, f"frame_{int(timestamp)}.jpg")
+        # -noaccurate_seek snaps to the preceding keyframe rather than decoding and
+        # discarding every frame between it and the timestamp
+        seek_args = ["-ss", str(timestamp)] if self.accurate_seek else ["-noaccurate_seek", "-ss", str(timestamp)]
         
         # CRITICAL: Do NOT pass headers! This causes 403 errors
-        result = subprocess.run(
+        # The JPEG is piped back rather than written to a shared temp path, since
+        # sessions extract frames concurrently
+        result = await self._run_blocking(
+            subprocess.run,
             [
                 self.ffmpeg_path,
-                "-ss", str(timestamp),
+                *seek_args,
                 "-i", stream_url,
                 "-frames:v", "1",
                 "-q:v", "2",
-                output_path,
-                "-y",
+                "-f", "image2pipe",
+                "-vcodec", "mjpeg",
+                "-",
             ],
             check=True,
             stdout=subprocess.PIPE,
@@ -169,24 +373,24 @@ class FrameExtractor:
             timeout=20
         )
         
-        with open(output_path, 'rb') as f:
-            frame_bytes = f.read()
-        
-        os.remove(output_path)
-        return frame_bytes
+        if not result.stdout:
+            raise Exception("FFmpeg produced no frame")
+        return result.stdout
     
     async def _extract_frame_fallback(self, video_url: str, timestamp: float) -> bytes:
         """Fallback: Use yt-dlp's external downloader to get a video segment."""
-        output_path = os.path.join(self.temp_dir, f"frame_{int(timestamp)}.jpg")
+        # Each call downloads into its own directory so concurrent fallbacks can't
+        # overwrite (or delete) each other's segments
+        segment_dir = tempfile.mkdtemp(prefix="segment_", dir=self.temp_dir)
         
         try:
-            print(f"[FrameExtractor] Attempting fallback with external downloader...")
+            logger.info("[FrameExtractor] Attempting fallback with external downloader...")
             
             # Use yt-dlp with FFmpeg as external downloader to get a 3-second segment
             ydl_opts = {
                 "quiet": True,
                 "format": "bestvideo[ext=mp4]/best[ext=mp4]/best",
-                "outtmpl": os.path.join(self.temp_dir, "temp_segment.%(ext)s"),
+                "outtmpl": os.path.join(segment_dir, "temp_segment.%(ext)s"),
                 "external_downloader": "ffmpeg",
                 "external_downloader_args": {
                     "ffmpeg_i": ["-ss", str(max(0, timestamp - 1)), "-t", "3"]
@@ -194,20 +398,20 @@ class FrameExtractor:
                 "ffmpeg_location": os.path.dirname(self.ffmpeg_path),
             }
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=True)
-                downloaded_file = ydl.prepare_filename(info)
+            downloaded_file = await self._run_blocking(self._download_clip, video_url, ydl_opts)
             
             # Extract frame from the downloaded segment (timestamp is around 1s in the clip)
-            subprocess.run(
+            result = await self._run_blocking(
+                subprocess.run,
                 [
                     self.ffmpeg_path,
                     "-ss", "1",
                     "-i", downloaded_file,
                     "-frames:v", "1",
                     "-q:v", "2",
-                    output_path,
-                    "-y",
+                    "-f", "image2pipe",
+                    "-vcodec", "mjpeg",
+                    "-",
                 ],
                 check=True,
                 stdout=subprocess.PIPE,
@@ -215,77 +419,47 @@ class FrameExtractor:
                 timeout=20
             )
             
-            # Clean up
-            if os.path.exists(downloaded_file):
-                os.remove(downloaded_file)
+            if not result.stdout:
+                raise Exception("FFmpeg produced no frame")
             
-            with open(output_path, 'rb') as f:
-                frame_bytes = f.read()
-            
-            os.remove(output_path)
-            print(f"[FrameExtractor] ✅ Fallback succeeded")
-            return frame_bytes
+            logger.info("[FrameExtractor] ✅ Fallback succeeded")
+            return result.stdout
             
         except Exception as e:
-            print(f"[FrameExtractor] Fallback failed: {e}")
+            logger.warning("[FrameExtractor] Fallback failed: %s", e)
             raise
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
     
     async def extract_livestream_frame(self, video_url: str) -> bytes:
         """Extract frame from a livestream (current timestamp) using FFmpeg."""
         try:
-            print(f"[FrameExtractor] Extracting current frame from livestream: {video_url}")
-            
-            # Get livestream URL
-            ydl_opts = {
-                'format': 'best[ext=mp4]/best',
-                'quiet': True,
-                'no_warnings': True,
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                video_stream_url = info['url']
-                http_headers = info.get('http_headers', {})
-            
-            # Use FFmpeg to capture current frame from livestream
-            output_path = os.path.join(self.temp_dir, f"livestream_frame_{int(datetime.now().timestamp())}.png")
-            
-            # Build FFmpeg command
-            cmd = [self.ffmpeg_path]
-            
-            # Add User-Agent header (critical for YouTube)
-            user_agent = http_headers.get('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            cmd.extend(['-user_agent', user_agent])
-            
-            # Add referer if present
-            if 'Referer' in http_headers:
-                cmd.extend(['-referer', http_headers['Referer']])
+            logger.debug("[FrameExtractor] Extracting current frame from livestream: %s", video_url)
             
+            # Use FFmpeg to capture current frame from livestream, piping the PNG
+            # back instead of going through a temp file shared with other sessions
+            cmd = [self.ffmpeg_path, *await self._livestream_input_args(video_url)]
             cmd.extend([
-                '-i', video_stream_url,
                 '-vframes', '1',
-                '-f', 'image2',
-                '-y',
-                output_path
+                '-f', 'image2pipe',
+                '-vcodec', 'png',
+                '-'
             ])
             
-            result = subprocess.run(
+            result = await self._run_blocking(
+                subprocess.run,
                 cmd,
                 capture_output=True,
-                text=True,
                 timeout=30
             )
             
             if result.returncode != 0:
-                raise Exception(f"FFmpeg error: {result.stderr}")
+                raise Exception(f"FFmpeg error: {result.stderr.decode(errors='replace')[-500:]}")
             
-            if not os.path.exists(output_path):
-                raise Exception("Frame file not created")
+            if not result.stdout:
+                raise Exception("FFmpeg produced no frame")
             
-            with open(output_path, 'rb') as f:
-                frame_bytes = f.read()
-            
-            os.remove(output_path)
+            frame_bytes = result.stdout
             
             # Save screenshot for showcase (livestream frames are unique!)
             await self._save_screenshot(frame_bytes, f"livestream_{int(datetime.now().timestamp())}", video_url)
@@ -293,9 +467,79 @@ class FrameExtractor:
             return frame_bytes
             
         except Exception as e:
-            print(f"[FrameExtractor] Error extracting livestream frame: {e}")
+            logger.error("[FrameExtractor] Error extracting livestream frame: %s", e)
+            # Forget the cached URL in case it has expired
+            self._livestream_sources.pop(video_url, None)
             raise
     
+    async def _livestream_input_args(self, video_url: str) -> List[str]:
+        """
+        FFmpeg input arguments (headers + stream URL) for a livestream.
+        
+        The yt-dlp lookup is cached for LIVESTREAM_URL_TTL_SECONDS, since the
+        stream URL stays valid far longer than the polling interval.
+        """
+        cached = self._livestream_sources.get(video_url)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        # Get livestream URL
+        ydl_opts = {
+            'format': 'best[ext=mp4]/best',
+            'quiet': True,
+            'no_warnings': True,
+        }
+        
+        info = await self._run_blocking(self._extract_info, video_url, ydl_opts)
+        video_stream_url = info['url']
+        http_headers = info.get('http_headers', {})
+        
+        # Add User-Agent header (critical for YouTube)
+        user_agent = http_headers.get('User-Agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+        args = ['-user_agent', user_agent]
+        
+        # Add referer if present
+        if 'Referer' in http_headers:
+            args.extend(['-referer', http_headers['Referer']])
+        
+        args.extend(['-i', video_stream_url])
+        
+        self._livestream_sources[video_url] = (time.monotonic() + LIVESTREAM_URL_TTL_SECONDS, args)
+        return args
+    
+    async def peek_livestream(self, video_url: str) -> Optional[np.ndarray]:
+        """
+        Grab the livestream's current frame as a COMPARE_SIZE grayscale thumbnail.
+        
+        FFmpeg scales and converts the frame itself and pipes raw pixels back, so
+        there's no PNG encode/decode, temp file or screenshot - cheap enough to poll
+        and only pay for a full extract_livestream_frame when something changed.
+        Returns None if the grab fails.
+        """
+        try:
+            width, height = COMPARE_SIZE
+            cmd = [
+                self.ffmpeg_path,
+                *await self._livestream_input_args(video_url),
+                '-vframes', '1',
+                '-vf', f'scale={width}:{height}:flags=area,format=gray',
+                '-f', 'rawvideo',
+                '-'
+            ]
+            
+            result = await self._run_blocking(subprocess.run, cmd, capture_output=True, timeout=30)
+            
+            if result.returncode != 0 or len(result.stdout) < width * height:
+                raise Exception(f"FFmpeg error: {result.stderr.decode(errors='replace')[-500:]}")
+            
+            return np.frombuffer(result.stdout[:width * height], dtype=np.uint8).reshape(height, width)
+            
+        except Exception as e:
+            logger.error("[FrameExtractor] Error peeking livestream: %s", e)
+            # Forget the cached URL in case it has expired
+            self._livestream_sources.pop(video_url, None)
+            return None
+    
     def _frame_to_bytes(self, frame: np.ndarray) -> bytes:
         """Convert OpenCV frame to PNG bytes."""
         # Convert BGR to RGB
@@ -333,81 +577,140 @@ class FrameExtractor:
             with open(filepath, 'wb') as f:
                 f.write(frame_bytes)
             
-            print(f"[FrameExtractor] Screenshot saved: {filename}")
+            logger.debug("[FrameExtractor] Screenshot saved: %s", filename)
             
         except Exception as e:
-            print(f"[FrameExtractor] Error saving screenshot: {e}")
+            logger.error("[FrameExtractor] Error saving screenshot: %s", e)
     
     async def compare_frames(self, frame1_bytes: bytes, frame2_bytes: bytes) -> float:
         """
         Compare two frames and return difference percentage.
         Returns a value between 0 (identical) and 1 (completely different).
         """
+        return self.compare_thumbnails(
+            self.make_thumbnail(frame1_bytes),
+            self.make_thumbnail(frame2_bytes)
+        )
+    
+    def make_thumbnail(self, frame_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Decode JPEG/PNG bytes to a COMPARE_SIZE grayscale uint8 thumbnail.
+        
+        Thumbnails are all scene detection needs, so callers can keep these
+        (4 KB each) between comparisons instead of full encoded frames.
+        Returns None if the frame can't be decoded.
+        """
         try:
-            # Convert to OpenCV frames
-            frame1 = self._bytes_to_frame(frame1_bytes)
-            frame2 = self._bytes_to_frame(frame2_bytes)
-            
-            # Resize to standard size for faster comparison
-            width, height = 320, 240
-            frame1_resized = cv2.resize(frame1, (width, height))
-            frame2_resized = cv2.resize(frame2, (width, height))
+            gray = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                raise ValueError("Could not decode frame")
             
-            # Convert to grayscale
-            gray1 = cv2.cvtColor(frame1_resized, cv2.COLOR_BGR2GRAY)
-            gray2 = cv2.cvtColor(frame2_resized, cv2.COLOR_BGR2GRAY)
+            # INTER_AREA averages source pixels, so downscaling doesn't alias
+            return cv2.resize(gray, COMPARE_SIZE, interpolation=cv2.INTER_AREA)
             
+        except Exception as e:
+            logger.error("[FrameExtractor] Error creating thumbnail: %s", e)
+            return None
+    
+    def compare_thumbnails(self, thumb1: Optional[np.ndarray], thumb2: Optional[np.ndarray]) -> float:
+        """
+        Compare two thumbnails from make_thumbnail and return difference percentage.
+        Returns a value between 0 (identical) and 1 (completely different).
+        """
+        if thumb1 is None or thumb2 is None:
+            # If a frame couldn't be decoded, assume frames are different
+            return 1.0
+        
+        try:
             # Calculate structural similarity
-            similarity_score = ssim(gray1, gray2)
+            similarity_score = ssim(thumb1, thumb2)
             
             # Convert to difference (0 = identical, 1 = completely different)
             difference = 1 - similarity_score
             
-            print(f"[FrameExtractor] Frame difference: {difference * 100:.2f}%")
+            logger.debug("[FrameExtractor] Frame difference: %.2f%%", difference * 100)
             
             return difference
             
         except Exception as e:
-            print(f"[FrameExtractor] Error comparing frames: {e}")
+            logger.error("[FrameExtractor] Error comparing frames: %s", e)
             # If comparison fails, assume frames are different
             return 1.0
     
-    async def is_significant_change(self, new_frame_bytes: bytes) -> bool:
-        """Check if a new frame is significantly different from the last frame."""
-        if self.last_frame is None:
-            self.last_frame = new_frame_bytes
-            return True
+    def drift_from_anchor(
+        self,
+        anchor: Optional[np.ndarray],
+        current: Optional[np.ndarray]
+    ) -> Optional[float]:
+        """
+        Hysteresis gate for scene detection between thumbnails.
         
-        difference = await self.compare_frames(self.last_frame, new_frame_bytes)
+        Returns how far `current` has drifted from `anchor`, the last frame
+        Gemini analyzed, or None if that is below frame_diff_low (camera noise).
+        Callers re-analyze once the drift exceeds frame_diff_threshold. Measuring
+        against the anchor rather than the previous frame means a slow pan or
+        fade still adds up to a scene change.
+        """
+        drift = self.compare_thumbnails(anchor, current)
+        if drift < self.frame_diff_low:
+            return None
+        return drift
+    
+    def open(self, video_url: str) -> "FrameExtractorSession":
+        """Start tracking frames for one video (one per music session)."""
+        return FrameExtractorSession(self, video_url)
+    
+    async def get_video_info(self, video_url: str) -> dict:
+        """
+        Get video info (duration, title, is_live).
         
-        if difference > self.frame_diff_threshold:
-            self.last_frame = new_frame_bytes
-            return True
+        Results are cached for VIDEO_INFO_TTL_SECONDS, and concurrent callers for
+        the same URL share one yt-dlp lookup - the info request and the session
+        start for a video (or several sessions on one demo video) only pay it once.
+        """
+        entry = self._video_info.get(video_url)
+        if entry is None or (entry[1].done() and time.monotonic() >= entry[0]):
+            lookup = asyncio.ensure_future(self._fetch_video_info(video_url))
+            entry = (time.monotonic() + VIDEO_INFO_TTL_SECONDS, lookup)
+            self._video_info[video_url] = entry
+            if len(self._video_info) > VIDEO_INFO_CACHE_SIZE:
+                self._video_info.popitem(last=False)
+        else:
+            self._video_info.move_to_end(video_url)
         
-        return False
+        try:
+            # Shielded so one caller giving up doesn't cancel the lookup for the others
+            info = await asyncio.shield(entry[1])
+        except Exception:
+            # Don't cache failures
+            if self._video_info.get(video_url) is entry:
+                del self._video_info[video_url]
+            raise
+        
+        return dict(info)
     
-    async def get_video_info(self, video_url: str) -> dict:
-        """Get video info (duration, title, is_live)."""
+    async def _fetch_video_info(self, video_url: str) -> dict:
+        """Look up video info with yt-dlp."""
         try:
             ydl_opts = {
                 'quiet': True,
                 'no_warnings': True,
             }
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=False)
-                
-                return {
-                    "title": info.get('title', ''),
-                    "duration": info.get('duration', 0),
-                    "is_live": info.get('is_live', False),
-                    "author": info.get('uploader', ''),
-                    "view_count": info.get('view_count', 0),
-                    "thumbnail": info.get('thumbnail', '')
-                }
-                
+            info = await self._run_blocking(self._extract_info, video_url, ydl_opts)
+            
+            return {
+                "id": info.get('id', ''),
+                "title": info.get('title', ''),
+                "duration": info.get('duration', 0),
+                "is_live": info.get('is_live', False),
+                "author": info.get('uploader', ''),
+                "view_count": info.get('view_count', 0),
+                "thumbnail": info.get('thumbnail', '')
+            }
+            
         except Exception as e:
-            print(f"[FrameExtractor] Error getting video info: {e}")
+            logger.error("[FrameExtractor] Error getting video info: %s", e)
             raise
     
     def calculate_frame_timestamps(self, duration_seconds: int, num_frames: int = 10) -> List[int]:
@@ -425,16 +728,41 @@ class FrameExtractor:
     
     async def cleanup(self):
         """Clean up resources."""
+        # Don't wait on in-flight ffmpeg/yt-dlp calls; drop anything still queued
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        
         try:
-            # Clean up temp directory
-            if os.path.exists(self.temp_dir):
-                for file in os.listdir(self.temp_dir):
-                    os.remove(os.path.join(self.temp_dir, file))
-                os.rmdir(self.temp_dir)
-            print("[FrameExtractor] Cleanup complete")
+            # Clean up temp directory (including any leftover segment directories)
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            logger.info("[FrameExtractor] Cleanup complete")
         except Exception as e:
-            print(f"[FrameExtractor] Cleanup error: {e}")
+            logger.error("[FrameExtractor] Cleanup error: %s", e)
+
+
+
+class FrameExtractorSession:
+    """
+    Per-video frame comparison state.
+    
+    The FrameExtractor itself is shared by every session, so anything that
+    depends on which frames one video has already shown lives here instead.
+    """
     
-    def reset(self):
-        """Reset frame comparison state."""
-        self.last_frame = None
+    def __init__(self, extractor: FrameExtractor, video_url: str):
+        self.extractor = extractor
+        self.video_url = video_url
+        self.last_frame: Optional[np.ndarray] = None  # Thumbnail of the last significant frame
+    
+    def is_significant_change(self, new_thumbnail: Optional[np.ndarray]) -> bool:
+        """Check if a thumbnail (from make_thumbnail or peek_livestream) differs significantly from the last significant frame."""
+        if self.last_frame is None:
+            self.last_frame = new_thumbnail
+            return True
+        
+        difference = self.extractor.compare_thumbnails(self.last_frame, new_thumbnail)
+        
+        if difference > self.extractor.frame_diff_threshold:
+            self.last_frame = new_thumbnail
+            return True
+        
+        return False
@@ -6,14 +6,178 @@ Uses context-aware prompting to prevent redundant suggestions.
 Uses Google Generative AI SDK (API key) instead of Vertex AI.
 """
 
+import asyncio
+import logging
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Set, Tuple
 import google.generativeai as genai
+import imagehash
+import orjson
 from PIL import Image
 import io
 from services.composition_context import CompositionContext
 
+logger = logging.getLogger(__name__)
+
+
+# Initial music prompt used when metadata analysis is unavailable or fails
+DEFAULT_METADATA_PROMPT = "ambient instrumental background music"
+
+# Delta analyses remembered per (previous, current) frame pair
+DELTA_CACHE_SIZE = 512
+# Max pHash Hamming distance (per frame, out of 64 bits) to count as the same shot
+DELTA_CACHE_MAX_DISTANCE = 4
+# Near matches are found through an index on bands of the previous frame's hash.
+# Split into one more band than the allowed distance, at least one band of any
+# near-identical hash matches exactly.
+DELTA_CACHE_BANDS = DELTA_CACHE_MAX_DISTANCE + 1
+_BAND_BITS = -(-64 // DELTA_CACHE_BANDS)
+
+# Delta requests from concurrent sessions arriving within this window share one Gemini call
+ANALYSIS_BATCH_WINDOW_MS = 50
+ANALYSIS_BATCH_MAX = 8
+
+
+class AnalysisBatcher:
+    """
+    Coalesces frame-delta requests from concurrent sessions into single Gemini calls.
+    
+    Requests that arrive within window_ms of each other (up to max_batch) are sent
+    as one multi-image prompt that asks for a JSON array with one analysis per
+    pair. A lone request, or any pair the batched answer leaves out, is sent on
+    its own exactly as analyze_frame_delta would. When no other request is queued
+    or being prepared, a request is dispatched at once rather than waiting out
+    the window.
+    """
+    
+    def __init__(
+        self,
+        analyzer: "GeminiAnalyzer",
+        max_batch: int = ANALYSIS_BATCH_MAX,
+        window_ms: int = ANALYSIS_BATCH_WINDOW_MS
+    ):
+        self.analyzer = analyzer
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Dict[asyncio.Task, List[Tuple]] = {}  # Batches currently waiting on Gemini
+        self._preparing = 0  # Submitted requests still being decoded and hashed
+    
+    async def submit(
+        self,
+        old_frame_bytes: bytes,
+        new_frame_bytes: bytes,
+        composition_context: CompositionContext
+    ) -> Dict:
+        """Queue a frame pair for analysis and wait for its result."""
+        analyzer = self.analyzer
+        self._preparing += 1
+        try:
+            old_image, new_image, cache_key, cached = await analyzer._prepare_delta(
+                old_frame_bytes, new_frame_bytes, composition_context
+            )
+        finally:
+            self._preparing -= 1
+        if cached is not None:
+            return cached
+        
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run(), name="gemini-batcher")
+        
+        # Build the prompt now - the composition context can move on while queued
+        prompt = analyzer._delta_prompt(composition_context)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((old_image, new_image, prompt, cache_key, future))
+        
+        return await future
+    
+    async def _run(self):
+        """Collect requests into batches and dispatch each without blocking the next."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            
+            # Nothing else is on its way, so don't hold a lone request for the window
+            lone = self._queue.empty() and not self._preparing
+            
+            while not lone and len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight[task] = batch
+            task.add_done_callback(self._on_dispatch_done)
+    
+    def _on_dispatch_done(self, task: asyncio.Task):
+        """Forget a finished batch."""
+        self._inflight.pop(task, None)
+    
+    async def _dispatch(self, batch: List[Tuple]):
+        """Send a batch to Gemini and resolve each caller's future with its own analysis."""
+        analyses: List[Optional[str]] = [None] * len(batch)
+        
+        if len(batch) > 1:
+            try:
+                analyses = await self.analyzer._request_delta_batch([item[:3] for item in batch])
+                logger.debug("[GeminiAnalyzer] Batched %d delta analyses into one request", len(batch))
+            except Exception as e:
+                logger.warning("[GeminiAnalyzer] Batched delta analysis failed, sending individually: %s", e)
+        
+        await asyncio.gather(*(
+            self._resolve(item, analysis) for item, analysis in zip(batch, analyses)
+        ))
+    
+    async def _resolve(self, item: Tuple, analysis: Optional[str]):
+        """Finish one request, analyzing it on its own if the batch didn't cover it."""
+        old_image, new_image, prompt, cache_key, future = item
+        
+        try:
+            if analysis is None:
+                analysis = await self.analyzer._request_delta(old_image, new_image, prompt)
+            
+            result = self.analyzer._delta_result(analysis)
+            self.analyzer._store_delta(cache_key, result)
+            
+            if not future.done():
+                future.set_result(result)
+                
+        except Exception as e:
+            logger.error("[GeminiAnalyzer] Error analyzing frame delta: %s", e)
+            if not future.done():
+                future.set_exception(e)
+    
+    async def close(self):
+        """Stop batching and cancel anything still waiting."""
+        # Cancelling a dispatch doesn't settle its callers' futures, so collect them first
+        futures = [item[-1] for batch in self._inflight.values() for item in batch]
+        tasks = [*self._inflight]
+        if self._task:
+            tasks.append(self._task)
+        
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self._queue:
+            while not self._queue.empty():
+                futures.append(self._queue.get_nowait()[-1])
+        
+        for future in futures:
+            future.cancel()
+
 
 class GeminiAnalyzer:
     """Analyzes video frames using Gemini vision capabilities."""
@@ -28,6 +192,19 @@ class GeminiAnalyzer:
         self.model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
         self.temperature = temperature or float(os.getenv("GEMINI_TEMPERATURE", "0.7"))
         
+        # Scene changes often repeat (cuts back to the same shot, recurring b-roll),
+        # so delta analyses are reused for perceptually identical frame pairs
+        self._delta_cache: OrderedDict[Tuple, Dict] = OrderedDict()
+        # (context, band number, band value) -> cache keys, for near-match lookups
+        self._delta_index: Dict[Tuple, Set[Tuple]] = {}
+        # Lookups run on the executor threads, stores on the event loop
+        self._delta_lock = threading.Lock()
+        self.delta_cache_hits = 0
+        self.delta_cache_misses = 0
+        self.batcher = AnalysisBatcher(self)
+        # JPEG decoding and perceptual hashing run here rather than on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gemini-frames")
+        
         # Check if API key is configured
         if not self.api_key:
             print("\n" + "=" * 60)
@@ -57,10 +234,80 @@ class GeminiAnalyzer:
             print("=" * 60 + "\n")
             self.model = None
     
+    async def warmup(self):
+        """
+        Open the SDK's connection to the Gemini API ahead of the first real request.
+        
+        The client keeps its transport alive between calls, so paying the DNS/TLS
+        setup here (with a free count_tokens call) takes it off the first session's
+        startup path. Failures are harmless - the first real call just pays it.
+        """
+        if not self.model:
+            return
+        
+        try:
+            await self.model.count_tokens_async("warmup")
+            print(f"[GeminiAnalyzer] Connection warmed up")
+        except Exception as e:
+            print(f"[GeminiAnalyzer] Warmup failed (continuing): {e}")
+    
     def _bytes_to_image(self, frame_bytes: bytes) -> Image.Image:
         """Convert bytes to PIL Image."""
         return Image.open(io.BytesIO(frame_bytes))
     
+    def _frame_hash(self, image: Image.Image) -> int:
+        """Perceptual hash of a frame (DCT over a 32x32 grayscale downsample), as a 64-bit int."""
+        return int(str(imagehash.phash(image)), 16)
+    
+    @staticmethod
+    def _hash_bands(frame_hash: int) -> List[Tuple[int, int]]:
+        """Split a 64-bit hash into DELTA_CACHE_BANDS (band number, value) pairs."""
+        mask = (1 << _BAND_BITS) - 1
+        return [(band, (frame_hash >> (band * _BAND_BITS)) & mask) for band in range(DELTA_CACHE_BANDS)]
+    
+    def _delta_context_key(self, composition_context: CompositionContext) -> Tuple:
+        """The parts of the composition context the delta prompt depends on."""
+        state = composition_context.current_state
+        return (
+            composition_context.video_title,
+            tuple(p.text for p in composition_context.user_prompts),
+            state.get('genre'),
+            state['mood'],
+            state['tempo'],
+            state['intensity']
+        )
+    
+    def _lookup_delta(self, old_hash: int, new_hash: int, context_key: Tuple) -> Optional[Dict]:
+        """
+        Find a cached delta analysis for a near-identical frame pair under the same
+        context (caller holds _delta_lock). Exact pairs are a single dict probe;
+        otherwise only entries sharing a hash band with the previous frame are checked.
+        """
+        key = (old_hash, new_hash, context_key)
+        analysis = self._delta_cache.get(key)
+        if analysis is not None:
+            self._delta_cache.move_to_end(key)
+            return analysis
+        
+        for band in self._hash_bands(old_hash):
+            for key in self._delta_index.get((context_key, *band), ()):
+                cached_old, cached_new, _ = key
+                if (
+                    (cached_old ^ old_hash).bit_count() <= DELTA_CACHE_MAX_DISTANCE
+                    and (cached_new ^ new_hash).bit_count() <= DELTA_CACHE_MAX_DISTANCE
+                ):
+                    self._delta_cache.move_to_end(key)
+                    return self._delta_cache[key]
+        return None
+    
+    def get_cache_stats(self) -> Dict:
+        """Get delta cache statistics."""
+        return {
+            "size": len(self._delta_cache),
+            "hits": self.delta_cache_hits,
+            "misses": self.delta_cache_misses
+        }
+    
     def _generate_lyria_optimized_prompt(self, frame_description: str, composition_context: CompositionContext) -> str:
         """Generate a Lyria-optimized prompt that produces rich musical descriptions."""
         state = composition_context.current_state
@@ -172,23 +419,11 @@ Music prompt for this scene:"""
             print(f"[GeminiAnalyzer] Error describing image: {e}")
             raise
     
-    async def analyze_frame_delta(
-        self,
-        old_frame_bytes: bytes,
-        new_frame_bytes: bytes,
-        composition_context: CompositionContext
-    ) -> Dict:
-        """
-        Compare two frames and analyze the differences.
-        Only returns composition notes if there is a significant change.
-        """
-        try:
-            old_image = self._bytes_to_image(old_frame_bytes)
-            new_image = self._bytes_to_image(new_frame_bytes)
-            
-            state = composition_context.current_state
-            
-            prompt = f"""You are a music director analyzing scene changes for Lyria RealTime music generation.
+    def _delta_prompt(self, composition_context: CompositionContext) -> str:
+        """Build the scene-change prompt for a frame pair under the given composition context."""
+        state = composition_context.current_state
+        
+        return f"""You are a music director analyzing scene changes for Lyria RealTime music generation.
 
 Video: "{composition_context.video_title}"
 User preferences: {composition_context.user_prompts}
@@ -230,30 +465,177 @@ Compare Frame 1 (previous) vs Frame 2 (current):
 If the change is minor or music is already appropriate, say "no change needed".
 
 Analysis:"""
-
-            response = await self.model.generate_content_async(
-                [old_image, "Frame 1 (previous)", new_image, "Frame 2 (current)", prompt],
-                generation_config=genai.GenerationConfig(
-                    temperature=self.temperature,
-                    max_output_tokens=256,
-                )
+    
+    def _delta_result(self, analysis: str) -> Dict:
+        """Turn a delta analysis into the result dict, deciding whether the music should change."""
+        lower_analysis = analysis.lower()
+        needs_change = not any(phrase in lower_analysis for phrase in [
+            'no change needed',
+            "should not change",
+            'no updates needed'
+        ])
+        
+        return {
+            "analysis": analysis,
+            "needs_change": needs_change,
+            "timestamp": datetime.now().timestamp()
+        }
+    
+    def _decode_and_hash(self, frame_bytes: bytes) -> Tuple[Image.Image, int]:
+        """Decode a frame and compute its perceptual hash (blocking - runs on the executor)."""
+        image = self._bytes_to_image(frame_bytes)
+        image.load()
+        return image, self._frame_hash(image)
+    
+    async def _prepare_delta(
+        self,
+        old_frame_bytes: bytes,
+        new_frame_bytes: bytes,
+        composition_context: CompositionContext
+    ) -> Tuple[Image.Image, Image.Image, Tuple, Optional[Dict]]:
+        """
+        Decode both frames off the event loop, build their cache key (both
+        perceptual hashes plus the musical context) and look it up in the cache.
+        """
+        context_key = self._delta_context_key(composition_context)
+        loop = asyncio.get_running_loop()
+        (old_image, old_hash), (new_image, new_hash) = await asyncio.gather(
+            loop.run_in_executor(self._executor, self._decode_and_hash, old_frame_bytes),
+            loop.run_in_executor(self._executor, self._decode_and_hash, new_frame_bytes)
+        )
+        cache_key = (old_hash, new_hash, context_key)
+        cached = await loop.run_in_executor(self._executor, self._cached_delta, cache_key)
+        return old_image, new_image, cache_key, cached
+    
+    def _cached_delta(self, cache_key: Tuple) -> Optional[Dict]:
+        """Return a fresh copy of a cached delta analysis, counting the hit or miss."""
+        with self._delta_lock:
+            cached = self._lookup_delta(*cache_key)
+            if cached is None:
+                self.delta_cache_misses += 1
+                return None
+            self.delta_cache_hits += 1
+        
+        print(f"[GeminiAnalyzer] Delta cache hit ({self.delta_cache_hits} hits / {self.delta_cache_misses} misses)")
+        return {**cached, "timestamp": datetime.now().timestamp()}
+    
+    def _store_delta(self, cache_key: Tuple, result: Dict) -> None:
+        """Remember a delta analysis, evicting the least recently used entry."""
+        old_hash, _, context_key = cache_key
+        with self._delta_lock:
+            if cache_key not in self._delta_cache:
+                for band in self._hash_bands(old_hash):
+                    self._delta_index.setdefault((context_key, *band), set()).add(cache_key)
+            self._delta_cache[cache_key] = result
+            
+            if len(self._delta_cache) > DELTA_CACHE_SIZE:
+                evicted, _ = self._delta_cache.popitem(last=False)
+                for band in self._hash_bands(evicted[0]):
+                    index_key = (evicted[2], *band)
+                    bucket = self._delta_index[index_key]
+                    bucket.discard(evicted)
+                    if not bucket:
+                        del self._delta_index[index_key]
+    
+    async def _request_delta(self, old_image: Image.Image, new_image: Image.Image, prompt: str) -> str:
+        """Ask Gemini to compare one frame pair."""
+        response = await self.model.generate_content_async(
+            [old_image, "Frame 1 (previous)", new_image, "Frame 2 (current)", prompt],
+            generation_config=genai.GenerationConfig(
+                temperature=self.temperature,
+                max_output_tokens=256,
             )
+        )
+        
+        return response.text.strip()
+    
+    async def _request_delta_batch(self, pairs: List[Tuple[Image.Image, Image.Image, str]]) -> List[Optional[str]]:
+        """
+        Ask Gemini to compare several independent frame pairs in one request.
+        
+        Returns one analysis per pair, in order; None where the response didn't
+        include a usable answer for that pair.
+        """
+        contents = [
+            "You will analyze several independent frame pairs, each from a different video. "
+            "Treat every pair on its own, following only the instructions given for it."
+        ]
+        for index, (old_image, new_image, prompt) in enumerate(pairs, 1):
+            contents += [
+                f"Frame pair {index}:",
+                old_image, f"Pair {index} Frame 1 (previous)",
+                new_image, f"Pair {index} Frame 2 (current)",
+                f"Instructions for pair {index}:\n{prompt}"
+            ]
+        contents.append(
+            'Respond with a JSON array containing one object per frame pair: '
+            '{"pair": <pair number>, "analysis": "<your analysis>"}'
+        )
+        
+        response = await self.model.generate_content_async(
+            contents,
+            generation_config=genai.GenerationConfig(
+                temperature=self.temperature,
+                max_output_tokens=256 * len(pairs),
+                response_mime_type="application/json",
+            )
+        )
+        
+        analyses: List[Optional[str]] = [None] * len(pairs)
+        for entry in orjson.loads(response.text):
+            index = entry.get("pair")
+            analysis = entry.get("analysis")
+            if isinstance(index, int) and 1 <= index <= len(pairs) and isinstance(analysis, str):
+                analyses[index - 1] = analysis.strip()
+        
+        return analyses
+    
+    async def submit_delta(
+        self,
+        old_frame_bytes: bytes,
+        new_frame_bytes: bytes,
+        composition_context: CompositionContext
+    ) -> Dict:
+        """
+        Analyze a frame pair like analyze_frame_delta, but through the shared batcher
+        so scene changes from concurrent sessions go out in a single Gemini request.
+        """
+        return await self.batcher.submit(old_frame_bytes, new_frame_bytes, composition_context)
+    
+    async def close(self):
+        """Stop the analysis batcher and the frame decoding workers."""
+        await self.batcher.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def analyze_frame_delta(
+        self,
+        old_frame_bytes: bytes,
+        new_frame_bytes: bytes,
+        composition_context: CompositionContext
+    ) -> Dict:
+        """
+        Compare two frames and analyze the differences.
+        Only returns composition notes if there is a significant change.
+        
+        Results are cached by the perceptual hashes of both frames, so a scene
+        change that looks like one already analyzed (in the same musical context)
+        skips the Gemini call.
+        """
+        try:
+            old_image, new_image, cache_key, cached = await self._prepare_delta(
+                old_frame_bytes, new_frame_bytes, composition_context
+            )
+            if cached is not None:
+                return cached
             
-            analysis = response.text.strip()
+            prompt = self._delta_prompt(composition_context)
             
-            # Check if change is needed
-            lower_analysis = analysis.lower()
-            needs_change = not any(phrase in lower_analysis for phrase in [
-                'no change needed',
-                "should not change",
-                'no updates needed'
-            ])
+            analysis = await self._request_delta(old_image, new_image, prompt)
             
-            return {
-                "analysis": analysis,
-                "needs_change": needs_change,
-                "timestamp": datetime.now().timestamp()
-            }
+            result = self._delta_result(analysis)
+            self._store_delta(cache_key, result)
+            
+            return result
             
         except Exception as e:
             print(f"[GeminiAnalyzer] Error analyzing frame delta: {e}")
@@ -309,7 +691,7 @@ Music prompt:"""
         """
         if not self.model:
             # Fallback if no API key
-            return "ambient instrumental background music"
+            return DEFAULT_METADATA_PROMPT
         
         try:
             title = video_info.get('title', 'Unknown')
@@ -350,4 +732,4 @@ Music prompt:"""
         except Exception as e:
             print(f"[GeminiAnalyzer] Error analyzing metadata: {e}")
             # Fallback to generic prompt
-            return "ambient instrumental background music"
+            return DEFAULT_METADATA_PROMPT
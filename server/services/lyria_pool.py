@@ -6,16 +6,51 @@ Connections are pre-established but don't call play() until needed.
 """
 
 import asyncio
+import logging
 import os
-import json
 import base64
+import time
+from collections import deque
 from typing import Dict, Optional, Callable
-from datetime import datetime
+import orjson
 import websockets
-from websockets.client import WebSocketClientProtocol
+from websockets.asyncio.client import ClientConnection
+from websockets.protocol import State
 import re
 
 
+logger = logging.getLogger(__name__)
+
+# WebSocket endpoint for Lyria RealTime Music API (API key appended per pool)
+LYRIA_WS_ENDPOINT = "wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateMusic"
+
+# Static protocol messages, serialized once at import (sent as TEXT frames)
+_SETUP_MESSAGE = orjson.dumps({"setup": {"model": "models/lyria-realtime-exp"}}).decode()
+_PLAY_MESSAGE = orjson.dumps({"playback_control": "play"}).decode()
+
+# Upper bound on how long shutdown waits for any single connection to close
+CLOSE_TIMEOUT_SECONDS = 5.0
+# Default upper bound on the startup connects, and on the background work shutdown
+# waits for, so an unreachable Lyria endpoint can't hang either one
+POOL_TIMEOUT_SECONDS = 15.0
+
+# Decoded audio chunks buffered between the receive loop and on_audio_data.
+# When full, the receive loop stops reading and backpressure reaches Lyria via TCP.
+AUDIO_QUEUE_SIZE = 8
+
+# Prompt updates arriving within this window are coalesced into a single send
+PROMPT_COALESCE_SECONDS = 0.02
+# ...and consecutive sends are spaced at least this far apart, so a burst of
+# scene changes collapses into one update carrying the latest prompt
+PROMPT_MIN_INTERVAL_SECONDS = 0.3
+
+# Keep-alive pings stop idle pool sockets from being reaped by NATs/proxies,
+# and detect dead ones so they can be replaced before anyone acquires them
+PING_INTERVAL_SECONDS = 20
+PING_TIMEOUT_SECONDS = 10
+WS_CLOSE_TIMEOUT_SECONDS = 5
+
+
 def sanitize_prompt_for_lyria(prompt: str) -> str:
     """
     Remove copyrighted content references from prompts to avoid Lyria filtering.
@@ -56,48 +91,67 @@ def sanitize_prompt_for_lyria(prompt: str) -> str:
 class LyriaConnection:
     """Represents a single Lyria Live Music API connection."""
     
-    def __init__(self, connection_id: str, api_key: str):
+    def __init__(self, connection_id: str, ws_url: str):
         self.id = connection_id
-        self.api_key = api_key
-        self.ws: Optional[WebSocketClientProtocol] = None
+        self.ws_url = ws_url
+        self.ws: Optional[ClientConnection] = None
         self.status = "disconnected"
         self.is_active = False
         self.session_id: Optional[str] = None
-        self.created_at = datetime.now().timestamp()
+        self.created_at = time.monotonic()
         self.on_audio_data: Optional[Callable] = None
         self._recv_task: Optional[asyncio.Task] = None
+        self._deliver_task: Optional[asyncio.Task] = None
+        self._audio_q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self._pending_prompt: Optional[tuple[str, float]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_prompt_sent = 0.0  # Event-loop time of the last prompt send
+        # Cleared by the downstream consumer when it's over its high-watermark
+        self.writable = asyncio.Event()
+        self.writable.set()
+    
+    async def _send_json(self, message: dict):
+        """
+        Serialize and send a JSON message.
+        
+        orjson serializes straight to UTF-8 bytes; we still decode to str so the
+        message goes out as a TEXT frame, which is what the Lyria endpoint expects.
+        """
+        await self.ws.send(orjson.dumps(message).decode())
+    
+    async def ping(self):
+        """Round-trip a WebSocket ping to confirm the socket is live end to end."""
+        pong = await self.ws.ping()
+        await asyncio.wait_for(pong, timeout=PING_TIMEOUT_SECONDS)
     
     async def connect(self):
         """Establish WebSocket connection to Lyria Live Music API."""
         try:
-            print(f"[LyriaConnection] {self.id} connecting to Lyria...")
-            
-            # WebSocket URL for Lyria RealTime Music API
-            ws_url = f"wss://generativelanguage.googleapis.com/ws/google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateMusic?key={self.api_key}"
+            logger.debug("[LyriaConnection] %s connecting to Lyria...", self.id)
             
             # Connect to WebSocket
-            self.ws = await websockets.connect(ws_url)
+            self.ws = await websockets.connect(
+                self.ws_url,
+                ping_interval=PING_INTERVAL_SECONDS,
+                ping_timeout=PING_TIMEOUT_SECONDS,
+                close_timeout=WS_CLOSE_TIMEOUT_SECONDS
+            )
             
             # Send setup message
-            setup_message = {
-                "setup": {
-                    "model": "models/lyria-realtime-exp"
-                }
-            }
-            await self.ws.send(json.dumps(setup_message))
+            await self.ws.send(_SETUP_MESSAGE)
             
             # Wait for setup confirmation
             response = await self.ws.recv()
-            response_data = json.loads(response)
+            response_data = orjson.loads(response)
             
             if "setupComplete" in response_data:
                 self.status = "ready"
-                print(f"[LyriaConnection] {self.id} connected and ready")
+                logger.info("[LyriaConnection] %s connected and ready", self.id)
             else:
                 raise Exception(f"Unexpected setup response: {response_data}")
             
         except Exception as e:
-            print(f"[LyriaConnection] {self.id} connection error: {e}")
+            logger.error("[LyriaConnection] %s connection error: %s", self.id, e)
             self.status = "error"
             raise
     
@@ -107,25 +161,29 @@ class LyriaConnection:
             if not self.ws:
                 return
             
-            print(f"[LyriaConnection] {self.id} receive task started, waiting for messages...")
+            logger.debug("[LyriaConnection] %s receive task started, waiting for messages...", self.id)
             
             async for message in self.ws:
-                data = json.loads(message)
+                # orjson parses str (TEXT) and bytes (BINARY) frames directly,
+                # so there's no decode/encode round-trip before parsing
+                data = orjson.loads(message)
                 
                 # Debug: Log all messages from Lyria
-                # print(f"[LyriaConnection] {self.id} received message: {json.dumps(data)[:200]}")
-                print(f"[LyriaConnection] {self.id} received {len(message)} bytes")
+                # logger.debug("[LyriaConnection] %s received message: %s", self.id, orjson.dumps(data)[:200])
+                logger.debug("[LyriaConnection] %s received %d bytes", self.id, len(message))
                 
                 # Handle filtered prompts (content policy violations)
                 if "filteredPrompt" in data:
                     filtered = data["filteredPrompt"]
-                    print(f"[LyriaConnection] {self.id} prompt was filtered!")
-                    print(f"[LyriaConnection] {self.id} reason: {filtered.get('filteredReason', 'unknown')}")
+                    logger.warning(
+                        "[LyriaConnection] %s prompt was filtered, reason: %s",
+                        self.id, filtered.get("filteredReason", "unknown")
+                    )
                     continue
                 
                 # Handle errors
                 if "error" in data:
-                    print(f"[LyriaConnection] {self.id} received error: {data.get('error')}")
+                    logger.error("[LyriaConnection] %s received error: %s", self.id, data.get("error"))
                     continue
                 
                 # Handle audio chunks from serverContent
@@ -141,31 +199,63 @@ class LyriaConnection:
                                 audio_data = base64.b64decode(audio_b64)
                                 
                                 if self.on_audio_data and audio_data:
-                                    print(f"[LyriaConnection] {self.id} sending {len(audio_data)} bytes of audio")
-                                    await self.on_audio_data(audio_data)
+                                    logger.debug("[LyriaConnection] %s sending %d bytes of audio", self.id, len(audio_data))
+                                    await self._audio_q.put(audio_data)
                     
                     # Handle turn completion
                     if "turnComplete" in server_content:
-                        print(f"[LyriaConnection] {self.id} turn complete")
+                        logger.debug("[LyriaConnection] %s turn complete", self.id)
                     
         except asyncio.CancelledError:
-            print(f"[LyriaConnection] {self.id} receive task cancelled")
+            logger.debug("[LyriaConnection] %s receive task cancelled", self.id)
         except Exception as e:
-            print(f"[LyriaConnection] {self.id} receive error: {e}")
+            logger.error("[LyriaConnection] %s receive error: %s", self.id, e)
             self.status = "error"
     
+    async def _deliver_audio(self):
+        """Background task to hand received audio to on_audio_data, decoupled from the receive loop."""
+        try:
+            while True:
+                audio_data = await self._audio_q.get()
+                
+                if not self.on_audio_data:
+                    continue
+                
+                # Hold delivery while the downstream sink is backed up; the queue
+                # then fills and the receive loop stops reading from Lyria.
+                await self.writable.wait()
+                
+                try:
+                    await self.on_audio_data(audio_data)
+                except Exception as e:
+                    logger.error("[LyriaConnection] %s audio callback error: %s", self.id, e)
+                    
+        except asyncio.CancelledError:
+            pass
+    
+    def pause_audio(self):
+        """Stop handing audio to on_audio_data until resume_audio() (downstream is backed up)."""
+        self.writable.clear()
+    
+    def resume_audio(self):
+        """Resume audio delivery once downstream has drained below its low-watermark."""
+        self.writable.set()
+    
     async def start(self, initial_prompt: str, bpm: int = 120, temperature: float = 1.0):
         """Start music generation with initial prompt."""
         # Sanitize prompt to avoid filtering (remove copyrighted content references)
         sanitized_prompt = sanitize_prompt_for_lyria(initial_prompt)
-        print(f"[LyriaConnection] {self.id} starting with prompt: {sanitized_prompt}")
+        logger.info("[LyriaConnection] %s starting with prompt: %s", self.id, sanitized_prompt)
         
         if not self.ws:
             raise RuntimeError("WebSocket not connected")
         
         self.is_active = True
         
-        # Start the receive task FIRST (before sending prompt)
+        # Start the receive and delivery tasks FIRST (before sending prompt)
+        self._audio_q = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+        self.writable.set()
+        self._deliver_task = asyncio.create_task(self._deliver_audio())
         self._recv_task = asyncio.create_task(self._receive_audio())
         
         # Send initial prompt using Live Music API format
@@ -179,57 +269,100 @@ class LyriaConnection:
                 ]
             }
         }
-        await self.ws.send(json.dumps(prompt_message))
+        await self._send_json(prompt_message)
+        self._last_prompt_sent = asyncio.get_running_loop().time()
         
         # Send playback control to actually start generation
-        control_message = {
-            "playback_control": "play"
-        }
-        await self.ws.send(json.dumps(control_message))
+        await self.ws.send(_PLAY_MESSAGE)
         
-        print(f"[LyriaConnection] {self.id} music generation started")
+        logger.info("[LyriaConnection] %s music generation started", self.id)
     
     async def update_prompt(self, new_prompt: str, weight: float = 1.0):
-        """Update composition with new prompt."""
+        """
+        Update composition with new prompt.
+        
+        Updates are buffered for PROMPT_COALESCE_SECONDS (and until at least
+        PROMPT_MIN_INTERVAL_SECONDS after the previous send) and flushed as one
+        message. Each client_content message replaces the whole prompt set, so if
+        several updates land in the same window only the latest one is sent.
+        """
         # Sanitize prompt to avoid filtering
         sanitized_prompt = sanitize_prompt_for_lyria(new_prompt)
-        print(f"[LyriaConnection] {self.id} updating prompt (length: {len(sanitized_prompt)} chars)")
+        logger.debug("[LyriaConnection] %s updating prompt (length: %d chars)", self.id, len(sanitized_prompt))
         
         if not self.ws:
             raise RuntimeError("WebSocket not connected")
         
-        # Send update using Live Music API format
-        message = {
-            "client_content": {
-                "weightedPrompts": [
-                    {
-                        "text": sanitized_prompt,
-                        "weight": weight
-                    }
-                ]
-            }
-        }
+        self._pending_prompt = (sanitized_prompt, weight)
         
-        await self.ws.send(json.dumps(message))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_prompt())
+    
+    async def _flush_prompt(self):
+        """Send buffered prompt updates as their coalescing/rate-limit window closes."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            await asyncio.sleep(max(
+                PROMPT_COALESCE_SECONDS,
+                self._last_prompt_sent + PROMPT_MIN_INTERVAL_SECONDS - loop.time()
+            ))
+            
+            pending, self._pending_prompt = self._pending_prompt, None
+            if pending is None or not self.ws:
+                return
+            
+            text, weight = pending
+            
+            # Send update using Live Music API format
+            message = {
+                "client_content": {
+                    "weightedPrompts": [
+                        {
+                            "text": text,
+                            "weight": weight
+                        }
+                    ]
+                }
+            }
+            
+            try:
+                await self._send_json(message)
+            except Exception as e:
+                logger.error("[LyriaConnection] %s prompt update error: %s", self.id, e)
+            
+            self._last_prompt_sent = loop.time()
+            
+            # Anything that arrived mid-send goes out on the next window
+            if self._pending_prompt is None:
+                return
     
     async def pause(self):
         """Pause music generation."""
-        print(f"[LyriaConnection] {self.id} pausing")
+        logger.info("[LyriaConnection] %s pausing", self.id)
         
         # WebSocket API may not support pause - stopping instead
         await self.stop()
     
     async def stop(self):
         """Stop music generation."""
-        print(f"[LyriaConnection] {self.id} stopping")
+        logger.info("[LyriaConnection] %s stopping", self.id)
         self.is_active = False
         
-        if self._recv_task:
-            self._recv_task.cancel()
-            try:
-                await self._recv_task
-            except asyncio.CancelledError:
-                pass
+        # Drop any prompt update that hasn't gone out yet
+        self._pending_prompt = None
+        
+        for task in (self._recv_task, self._deliver_task, self._flush_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        
+        self._recv_task = None
+        self._deliver_task = None
+        self._flush_task = None
     
     async def reset_context(self):
         """Reset the music context."""
@@ -244,7 +377,7 @@ class LyriaConnection:
             try:
                 await self.ws.close()
             except Exception as e:
-                print(f"[LyriaConnection] {self.id} close error: {e}")
+                logger.warning("[LyriaConnection] %s close error: %s", self.id, e)
         
         self.status = "closed"
 
@@ -255,73 +388,183 @@ class LyriaConnectionPool:
     def __init__(
         self,
         pool_size: int = None,
-        api_key: str = None
+        api_key: str = None,
+        timeout: float = None
     ):
         self.pool_size = pool_size or int(os.getenv("LYRIA_POOL_SIZE", "3"))
+        # Ceiling for demand-driven growth via ensure_warm()
+        self.max_size = max(self.pool_size, int(os.getenv("LYRIA_POOL_MAX_SIZE", "8")))
+        self.timeout = timeout or float(os.getenv("LYRIA_POOL_TIMEOUT_SECONDS", str(POOL_TIMEOUT_SECONDS)))
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
         
+        # Shared by every connection in the pool
+        self._ws_url = f"{LYRIA_WS_ENDPOINT}?key={self.api_key}"
+        
         self.pool: list[LyriaConnection] = []
         self.active_connections: Dict[str, LyriaConnection] = {}
+        # Idle, connected connections ready to hand out (FIFO)
+        self._ready: deque[LyriaConnection] = deque()
+        # In-flight background connection creations (strong refs until done)
+        self._bg_tasks: set[asyncio.Task] = set()
+        # Background closes of connections evicted from the pool
+        self._closing: set[asyncio.Task] = set()
+        # Watchers that evict idle connections whose socket dies
+        self._watchers: set[asyncio.Task] = set()
         self.is_initialized = False
     
     async def initialize(self):
         """Initialize the connection pool - call this on app startup."""
-        print(f"[LyriaPool] Initializing pool with {self.pool_size} connections...")
+        logger.info("[LyriaPool] Initializing pool with %d connections...", self.pool_size)
         
-        # Create connections concurrently
+        # Create connections concurrently; one failed connect shouldn't sink the rest
         tasks = [
             self._create_connection(i)
             for i in range(self.pool_size)
         ]
         
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Whatever connected in time is already in the pool; the rest are cancelled
+            logger.warning("[LyriaPool] Startup connects still pending after %.0fs, cancelled", self.timeout)
+        
+        failures = self.pool_size - len(self.pool)
+        if failures:
+            logger.warning(
+                "[LyriaPool] %d/%d connections failed to initialize (they will be created on demand)",
+                failures, self.pool_size
+            )
         
         self.is_initialized = True
-        print(f"[LyriaPool] Pool initialized with {len(self.pool)} ready connections")
+        logger.info("[LyriaPool] Pool initialized with %d ready connections", len(self.pool))
     
-    async def _create_connection(self, index: int) -> LyriaConnection:
-        """Create a single Lyria connection."""
+    async def _create_connection(self, index: int, ready: bool = True) -> LyriaConnection:
+        """
+        Create a single Lyria connection.
+        
+        When ready is False the connection is added to the pool but not queued
+        as available (the caller is about to hand it out directly).
+        """
+        connection_id = f"lyria-{index}-{int(time.time())}"
+        connection = LyriaConnection(connection_id, self._ws_url)
+        
         try:
-            connection_id = f"lyria-{index}-{int(datetime.now().timestamp())}"
-            connection = LyriaConnection(connection_id, self.api_key)
-            
             await connection.connect()
             self.pool.append(connection)
+            if ready:
+                self._mark_ready(connection)
             
             return connection
             
         except Exception as e:
-            print(f"[LyriaPool] Failed to create connection {index}: {e}")
+            logger.error("[LyriaPool] Failed to create connection %d: %s", index, e)
+            # Don't leave a half-open socket behind (e.g. bad setup response)
+            await connection.close()
+            raise
+        except asyncio.CancelledError:
+            # Cut off by a pool timeout - same cleanup, without the error
+            await connection.close()
             raise
     
+    def _evict(self, connection: LyriaConnection):
+        """Remove an idle connection from the pool and close its socket in the background."""
+        connection.status = "closed"
+        if connection in self._ready:
+            self._ready.remove(connection)
+        if connection in self.pool:
+            self.pool.remove(connection)
+        
+        task = asyncio.create_task(connection.close())
+        self._closing.add(task)
+        task.add_done_callback(self._on_close_done)
+    
+    def _on_close_done(self, task: asyncio.Task):
+        """Drop a finished background close, logging (and retrieving) any failure."""
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning("[LyriaPool] Error closing evicted connection: %r", task.exception())
+    
+    def _mark_ready(self, connection: LyriaConnection):
+        """Queue a connection as available and watch its socket while it sits idle."""
+        self._ready.append(connection)
+        
+        watcher = asyncio.create_task(self._watch_idle(connection, connection.ws))
+        self._watchers.add(watcher)
+        watcher.add_done_callback(self._watchers.discard)
+    
+    async def _watch_idle(self, connection: LyriaConnection, ws: ClientConnection):
+        """Evict and replace an idle connection if its socket closes (e.g. ping timeout)."""
+        await ws.wait_closed()
+        
+        # Only act if it's still the same idle socket (not acquired or reset since)
+        if connection.ws is not ws or connection not in self._ready:
+            return
+        
+        logger.info(
+            "[LyriaPool] Idle connection %s dropped (code %s), replacing in background",
+            connection.id, ws.close_code
+        )
+        self._evict(connection)
+        
+        if self.is_initialized:
+            self._spawn_connection()
+    
+    def _spawn_connection(self) -> asyncio.Task:
+        """Create a ready connection in the background, keeping a handle on the task."""
+        task = asyncio.create_task(self._create_connection(len(self.pool) + len(self._bg_tasks)))
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._on_bg_task_done)
+        return task
+    
+    def _on_bg_task_done(self, task: asyncio.Task):
+        """Drop a finished background task and retrieve its result."""
+        self._bg_tasks.discard(task)
+        if not task.cancelled():
+            # Failures are already logged by _create_connection; retrieving the
+            # exception stops asyncio from reporting it as never retrieved.
+            task.exception()
+    
     async def acquire_connection(self, session_id: str) -> LyriaConnection:
         """Get a connection from the pool - returns immediately with pre-warmed connection."""
         if not self.is_initialized:
             raise Exception("Connection pool not initialized. Call initialize() first.")
         
-        # Find an available connection
-        available = next(
-            (conn for conn in self.pool 
-             if conn.status == "ready" and not conn.is_active and not conn.session_id),
-            None
-        )
+        # Take the oldest ready connection, evicting any that errored while idle
+        available = None
+        while self._ready:
+            conn = self._ready.popleft()
+            if conn.status == "ready" and conn.ws and conn.ws.state is State.OPEN:
+                available = conn
+                break
+            
+            logger.info("[LyriaPool] Evicting stale connection %s (status %s)", conn.id, conn.status)
+            self._evict(conn)
         
         if not available:
-            print("[LyriaPool] No available connections, creating new one...")
-            available = await self._create_connection(len(self.pool))
+            logger.info("[LyriaPool] No available connections, creating new one...")
+            available = await self._create_connection(len(self.pool), ready=False)
+            
+            # A cold socket's first round-trip is the slow one; pay it here rather
+            # than on the first play/prompt messages
+            try:
+                await available.ping()
+            except Exception as e:
+                logger.warning("[LyriaPool] Warm-up ping failed for %s: %s", available.id, e)
             
             # Asynchronously create a replacement for the pool
-            asyncio.create_task(self._create_connection(len(self.pool)))
+            self._spawn_connection()
         
         # Mark as active and assign to session
         available.session_id = session_id
         self.active_connections[session_id] = available
         
-        print(f"[LyriaPool] Assigned connection {available.id} to session {session_id}")
-        print(f"[LyriaPool] Pool status: {self._count_available()}/{len(self.pool)} available")
+        logger.info(
+            "[LyriaPool] acquire conn=%s session=%s available=%d/%d",
+            available.id, session_id, self._count_available(), len(self.pool)
+        )
         
         return available
     
@@ -330,26 +573,62 @@ class LyriaConnectionPool:
         connection = self.active_connections.get(session_id)
         
         if not connection:
-            print(f"[LyriaPool] No connection found for session {session_id}")
+            logger.warning("[LyriaPool] No connection found for session %s", session_id)
             return
         
         # Stop the active session
         await connection.stop()
 
         # Close and reconnect to clear audio buffer (prevents old audio from playing on the next session)
-        print(f"[LyriaPool] Resetting connection {connection.id} to clear buffer...")
+        logger.debug("[LyriaPool] Resetting connection %s to clear buffer...", connection.id)
         await connection.close()
-        await connection.connect()
         
         # Reset connection state
         connection.is_active = False
         connection.session_id = None
         connection.on_audio_data = None  # Clear callback
-        
         del self.active_connections[session_id]
         
-        print(f"[LyriaPool] Released and reset connection {connection.id}")
-        print(f"[LyriaPool] Pool status: {self._count_available()}/{len(self.pool)} available")
+        try:
+            await connection.connect()
+        except Exception as e:
+            # Don't leave a dead connection in the pool; replace it instead
+            logger.warning("[LyriaPool] Reconnect of %s failed, evicting: %s", connection.id, e)
+            self._evict(connection)
+            if self.is_initialized:
+                self._spawn_connection()
+            return
+        
+        self._mark_ready(connection)
+        
+        logger.info(
+            "[LyriaPool] release conn=%s session=%s available=%d/%d",
+            connection.id, session_id, self._count_available(), len(self.pool)
+        )
+    
+    def ensure_warm(self, target: int) -> int:
+        """
+        Grow the pool so at least `target` connections are ready (or being created),
+        without exceeding max_size in total. Returns how many creations were started.
+        """
+        if not self.is_initialized:
+            return 0
+        
+        pending = len(self._bg_tasks)
+        wanted = target - len(self._ready) - pending
+        room = self.max_size - len(self.pool) - pending
+        count = max(0, min(wanted, room))
+        
+        for _ in range(count):
+            self._spawn_connection()
+        
+        if count:
+            logger.info(
+                "[LyriaPool] Pre-warming %d connection(s) for expected demand (target %d ready, pool %d/%d)",
+                count, target, len(self.pool), self.max_size
+            )
+        
+        return count
     
     def get_connection(self, session_id: str) -> Optional[LyriaConnection]:
         """Get active connection for a session."""
@@ -357,21 +636,40 @@ class LyriaConnectionPool:
     
     async def shutdown(self):
         """Shutdown the entire pool."""
-        print("[LyriaPool] Shutting down connection pool...")
+        logger.info("[LyriaPool] Shutting down connection pool...")
         
-        # Stop all active connections
-        for session_id, connection in self.active_connections.items():
-            await connection.stop()
+        # Let in-flight creations settle so they can't append to the pool after it's
+        # cleared, and let evicted connections finish closing
+        if self._bg_tasks or self._closing:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*self._bg_tasks, *self._closing, return_exceptions=True),
+                    timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning("[LyriaPool] Background work still running after %.0fs, cancelled", self.timeout)
+        
+        for watcher in list(self._watchers):
+            watcher.cancel()
+        
+        # Close all connections concurrently (close() also stops active sessions),
+        # bounding each so a single hung socket can't stall the whole shutdown
+        connections = list(self.pool)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(conn.close(), timeout=CLOSE_TIMEOUT_SECONDS) for conn in connections),
+            return_exceptions=True
+        )
         
-        # Close all connections
-        for connection in self.pool:
-            await connection.close()
+        for connection, result in zip(connections, results):
+            if isinstance(result, BaseException):
+                logger.warning("[LyriaPool] Error closing connection %s: %r", connection.id, result)
         
         self.pool.clear()
+        self._ready.clear()
         self.active_connections.clear()
         self.is_initialized = False
         
-        print("[LyriaPool] Pool shutdown complete")
+        logger.info("[LyriaPool] Pool shutdown complete")
     
     def get_stats(self) -> dict:
         """Get pool statistics."""
@@ -392,7 +690,4 @@ class LyriaConnectionPool:
     
     def _count_available(self) -> int:
         """Count available connections."""
-        return sum(
-            1 for conn in self.pool
-            if not conn.is_active and conn.status == "ready"
-        )
+        return len(self._ready)
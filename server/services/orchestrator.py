@@ -10,13 +10,104 @@ Manages the flow from video selection to audio streaming:
 """
 
 import asyncio
-from typing import Dict
+import logging
+import math
+import os
+import re
+import struct
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
-from services.lyria_pool import LyriaConnectionPool
+from services.lyria_pool import LyriaConnection, LyriaConnectionPool
 from services.composition_context import CompositionContext
-from services.gemini_analyzer import GeminiAnalyzer
-from services.frame_extractor import FrameExtractor
+from services.gemini_analyzer import GeminiAnalyzer, DEFAULT_METADATA_PROMPT
+from services.frame_extractor import FrameExtractor, FrameExtractorSession
 from services.session_logger import SessionLogger
+from services.audio_buffer import PCMSlabBuffer
+from services.audio_relay import AudioRelay
+
+
+logger = logging.getLogger(__name__)
+
+# Keep at most ~30 minutes of 48kHz stereo 16-bit audio for download
+AUDIO_BUFFER_MAX_BYTES = 48000 * 2 * 2 * 60 * 30
+
+# Demand-driven Lyria pre-warming: sample session arrivals every interval and
+# smooth the rate with an EWMA, then keep enough connections warm to cover the
+# arrivals expected while a connection is being set up, plus a spare
+PREWARM_INTERVAL_SECONDS = 10
+PREWARM_EWMA_ALPHA = 0.3
+PREWARM_SPARE_CONNECTIONS = 1
+
+# 44-byte PCM WAV header: RIFF chunk, fmt subchunk, data subchunk header
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Minimum time between Gemini scene analyses; changes inside the window are
+# folded into the next analysis instead of triggering their own
+MIN_ANALYSIS_SPACING_SECONDS = 3
+
+# After this many scene analyses in a row that didn't change the music, raise the
+# drift needed for the next one by ANALYSIS_BACKOFF_FACTOR per further miss (capped)
+ANALYSIS_BACKOFF_AFTER = 2
+ANALYSIS_BACKOFF_FACTOR = 1.5
+ANALYSIS_BACKOFF_MAX_THRESHOLD = 0.5
+
+# Extracted frames buffered ahead of recorded-video processing
+FRAME_PREFETCH_DEPTH = 2
+
+# Marks the end of a prefetched stream
+_PREFETCH_END = object()
+
+# Scene-driven prompt updates this similar (bag-of-words cosine) to the prompt
+# Lyria is already playing are skipped
+PROMPT_SKIP_SIMILARITY = 0.95
+
+# Livestream polling slows down (doubling) while nothing changes, up to this interval
+LIVESTREAM_MAX_INTERVAL_SECONDS = 30
+
+# Metadata-derived initial prompts remembered across sessions (LRU)
+METADATA_PROMPT_CACHE_SIZE = 256
+
+
+def _prompt_similarity(prompt_a: str, prompt_b: str) -> float:
+    """Cosine similarity of two prompts' word counts (1.0 = same words, same mix)."""
+    words_a = Counter(re.findall(r"\w+", prompt_a.lower()))
+    words_b = Counter(re.findall(r"\w+", prompt_b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    
+    dot = sum(count * words_b[word] for word, count in words_a.items())
+    norm_a = math.sqrt(sum(count * count for count in words_a.values()))
+    norm_b = math.sqrt(sum(count * count for count in words_b.values()))
+    return dot / (norm_a * norm_b)
+
+
+@dataclass(slots=True)
+class Session:
+    """State for one music generation session (kept after stop for downloads)."""
+    session_id: str
+    video_url: str
+    video_info: dict
+    composition_context: CompositionContext
+    lyria_connection: LyriaConnection
+    client_websocket: Any
+    session_logger: SessionLogger
+    is_live: bool
+    started_at: float  # Wall-clock timestamp (display only; durations use the monotonic clock)
+    started_monotonic_ns: int  # For measuring duration/uptime
+    audio_relay: AudioRelay  # Owns the download buffer and the client audio sender
+    frame_session: FrameExtractorSession  # This video's frame comparison state
+    frame_index: int = 0
+    is_active: bool = True
+    playback_offset: float = 0
+    playback_start_ns: int = 0
+    scrub_event: asyncio.Event = field(default_factory=asyncio.Event)  # Wakes the frame scheduler on seek/stop
+    frames_task: Optional[asyncio.Task] = None
+    last_prompt: Optional[str] = None  # Prompt most recently sent to Lyria
+    stopped_at: Optional[float] = None  # time.monotonic() when stopped
 
 
 class MusicGenerationOrchestrator:
@@ -29,20 +120,82 @@ class MusicGenerationOrchestrator:
         self.gemini_analyzer = GeminiAnalyzer()
         self.frame_extractor = FrameExtractor()
         
-        self.active_sessions: Dict[str, dict] = {}
+        self.active_sessions: Dict[str, Session] = {}
         self.is_initialized = False
+        
+        # Frame decoding and comparison (OpenCV releases the GIL) runs here so
+        # sessions' per-frame work doesn't hold up the event loop or each other
+        self._cpu_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="frame-cpu")
+        
+        # Session arrival tracking for pool pre-warming
+        self._arrivals_since_sample = 0
+        self._arrival_rate = 0.0  # EWMA, sessions/second
+        self._setup_seconds = 5.0  # EWMA of startup time (seconds), seeded pessimistically
+        self._prewarm_task: Optional[asyncio.Task] = None
+        self._prewarm_videos_task: Optional[asyncio.Task] = None
+        
+        # Initial prompts from video metadata, so replays skip the Gemini call
+        self._metadata_prompt_cache: OrderedDict[str, str] = OrderedDict()
+        # Per-key locks so concurrent first viewers share one Gemini call
+        self._metadata_prompt_locks: Dict[str, asyncio.Lock] = {}
     
     async def initialize(self):
         """Initialize all services."""
-        print("[Orchestrator] Initializing services...")
+        logger.info("[Orchestrator] Initializing services...")
         
         await asyncio.gather(
             self.lyria_pool.initialize(),
-            self.frame_extractor.initialize()
+            self.frame_extractor.initialize(),
+            self.gemini_analyzer.warmup()
         )
         
         self.is_initialized = True
-        print("[Orchestrator] All services initialized")
+        self._prewarm_task = asyncio.create_task(self._prewarm_pool(), name="lyria-prewarm")
+        
+        # Showcase videos known up front get their lookups done before anyone asks
+        prewarm_urls = [url.strip() for url in os.getenv("PREWARM_VIDEO_URLS", "").split(",") if url.strip()]
+        if prewarm_urls:
+            self._prewarm_videos_task = asyncio.create_task(
+                self._prewarm_videos(prewarm_urls), name="video-prewarm"
+            )
+        
+        logger.info("[Orchestrator] All services initialized")
+    
+    async def _run_cpu(self, func, *args):
+        """Run CPU-bound frame work on the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_executor, func, *args)
+    
+    async def _prewarm_videos(self, video_urls: List[str]):
+        """Prewarm several videos concurrently."""
+        await asyncio.gather(*(self.prewarm_video(url) for url in video_urls), return_exceptions=True)
+    
+    async def prewarm_video(self, video_url: str):
+        """
+        Fill the video info and metadata prompt caches for a video, so the first
+        session on it skips the yt-dlp lookup and the Gemini metadata call.
+        """
+        try:
+            video_info = await self.frame_extractor.get_video_info(video_url)
+            await self._get_metadata_prompt(video_info)
+            logger.info("[Orchestrator] Prewarmed video %s", video_info["title"])
+        except Exception as e:
+            logger.warning("[Orchestrator] Could not prewarm %s: %s", video_url, e)
+    
+    async def _prewarm_pool(self):
+        """Periodically resize the warm Lyria pool to the predicted session arrival rate."""
+        while True:
+            await asyncio.sleep(PREWARM_INTERVAL_SECONDS)
+            
+            sample = self._arrivals_since_sample / PREWARM_INTERVAL_SECONDS
+            self._arrivals_since_sample = 0
+            self._arrival_rate += PREWARM_EWMA_ALPHA * (sample - self._arrival_rate)
+            
+            self.lyria_pool.ensure_warm(self._prewarm_target())
+    
+    def _prewarm_target(self) -> int:
+        """Ready connections needed to cover arrivals during one session startup, plus spares."""
+        return math.ceil(self._arrival_rate * self._setup_seconds) + PREWARM_SPARE_CONNECTIONS
     
     async def start_music_generation(
         self,
@@ -55,107 +208,123 @@ class MusicGenerationOrchestrator:
         Returns immediately after starting - processing continues in background.
         """
         try:
-            start_time = datetime.now()
-            print(f"[Orchestrator] ⏱️  Starting music generation for session {session_id}")
+            start_time = time.monotonic_ns()
+            logger.info("[Orchestrator] ⏱️  Starting music generation for session %s", session_id)
             
             if not self.is_initialized:
                 raise Exception("Orchestrator not initialized")
             
+            self._arrivals_since_sample += 1
+            
             # If session already exists (user restarting), clean it up first
             if session_id in self.active_sessions:
-                print(f"[Orchestrator] 🔄 Session {session_id} already exists, cleaning up old data...")
+                logger.info("[Orchestrator] 🔄 Session %s already exists, cleaning up old data...", session_id)
                 old_session = self.active_sessions[session_id]
                 
                 # Stop old session if still active
-                if old_session.get("is_active"):
+                if old_session.is_active:
                     await self.stop_music_generation(session_id)
                 
                 # Clear old session completely
                 self.cleanup_session(session_id)
-                print(f"[Orchestrator] ✅ Old session data cleared")
+                logger.info("[Orchestrator] ✅ Old session data cleared")
             
             # Get video info
-            t0 = datetime.now()
+            t0 = time.monotonic_ns()
             video_info = await self.frame_extractor.get_video_info(video_url)
-            t1 = datetime.now()
-            print(f"[Orchestrator] ⏱️  Video info retrieved in {(t1-t0).total_seconds():.2f}s")
-            print(f"[Orchestrator] Video info: {video_info}")
+            t1 = time.monotonic_ns()
+            logger.debug("[Orchestrator] ⏱️  Video info retrieved in %.2fs", (t1 - t0) / 1e9)
+            logger.info("[Orchestrator] Video info: %s", video_info)
             
             # Create composition context
             composition_context = CompositionContext(video_info["title"])
             
-            # Create session logger
-            session_logger = SessionLogger(session_id)
-            session_logger.log_session_start(video_info, video_url)
-            print(f"[Orchestrator] Session log: {session_logger.get_log_path()}")
+            # Acquire Lyria connection from pool (pre-warmed, instant) and generate the
+            # initial music prompt from video metadata (fast, text-only) concurrently -
+            # both only depend on video_info, so startup waits for the slower one, not both
+            logger.info("[Orchestrator] Acquiring Lyria connection and analyzing video metadata...")
+            t0 = time.monotonic_ns()
+            lyria_connection, metadata_prompt = await asyncio.gather(
+                self.lyria_pool.acquire_connection(session_id),
+                self._get_metadata_prompt(video_info),
+                return_exceptions=True
+            )
+            t1 = time.monotonic_ns()
             
-            # Acquire Lyria connection from pool (pre-warmed, instant)
-            t0 = datetime.now()
-            lyria_connection = await self.lyria_pool.acquire_connection(session_id)
-            t1 = datetime.now()
-            print(f"[Orchestrator] ⏱️  Lyria connection acquired in {(t1-t0).total_seconds():.2f}s")
+            if isinstance(lyria_connection, BaseException):
+                raise lyria_connection
+            if isinstance(metadata_prompt, BaseException):
+                # Don't strand the connection we just acquired
+                await self.lyria_pool.release_connection(session_id)
+                raise metadata_prompt
             
-            # Set up audio data handler to relay to client
-            first_audio_received = [False]  # Track first audio chunk
-            first_audio_time = [None]
-            audio_chunks = []  # Store chunks for potential download
+            logger.debug("[Orchestrator] ⏱️  Lyria connection and metadata analysis ready in %.2fs", (t1 - t0) / 1e9)
             
-            async def relay_audio(audio_data):
-                try:
-                    if not first_audio_received[0]:
-                        first_audio_received[0] = True
-                        first_audio_time[0] = datetime.now()
-                        elapsed = (first_audio_time[0] - start_time).total_seconds()
-                        print(f"[Orchestrator] 🎵 First audio chunk received in {elapsed:.2f}s from start")
-                    
-                    # Store chunk for download capability
-                    audio_chunks.append(audio_data)
-                    
-                    # Relay to client
-                    await client_websocket.send_bytes(audio_data)
-                except Exception as e:
-                    print(f"[Orchestrator] Error relaying audio: {e}")
+            # Relay Lyria audio to the client (and keep it for download)
+            def log_first_audio():
+                elapsed = (time.monotonic_ns() - start_time) / 1e9
+                logger.info("[Orchestrator] 🎵 First audio chunk received in %.2fs from start", elapsed)
             
-            lyria_connection.on_audio_data = relay_audio
-            
-            # Generate initial music prompt from video metadata (fast, text-only)
-            print(f"[Orchestrator] Analyzing video metadata for initial music...")
-            t0 = datetime.now()
-            metadata_prompt = await self.gemini_analyzer.analyze_video_metadata(video_info)
-            t1 = datetime.now()
-            print(f"[Orchestrator] ⏱️  Metadata analysis completed in {(t1-t0).total_seconds():.2f}s")
+            audio_relay = AudioRelay(
+                client_websocket,
+                lyria_connection,
+                PCMSlabBuffer(max_bytes=AUDIO_BUFFER_MAX_BYTES),
+                on_first_audio=log_first_audio
+            )
+            lyria_connection.on_audio_data = audio_relay.on_audio_data
             
             # Start Lyria with metadata-based prompt (unique for each video)
-            t0 = datetime.now()
+            t0 = time.monotonic_ns()
             initial_prompt = composition_context.get_initial_prompt(metadata_prompt)
-            await lyria_connection.start(initial_prompt)
-            t1 = datetime.now()
-            print(f"[Orchestrator] ⏱️  Lyria started in {(t1-t0).total_seconds():.2f}s")
+            try:
+                await lyria_connection.start(initial_prompt)
+            except Exception:
+                # Hand the connection back instead of leaving it assigned to a session
+                # that never started
+                await self.lyria_pool.release_connection(session_id)
+                raise
+            t1 = time.monotonic_ns()
+            logger.debug("[Orchestrator] ⏱️  Lyria started in %.2fs", (t1 - t0) / 1e9)
+            
+            # Create the session logger only once Lyria is running, so a failed start
+            # doesn't leave its open file and writer task behind
+            session_logger = SessionLogger(session_id)
+            session_logger.log_session_start(video_info, video_url)
+            logger.info("[Orchestrator] Session log: %s", session_logger.get_log_path())
             
-            total_startup = (t1 - start_time).total_seconds()
-            print(f"[Orchestrator] ✅ Music generation ready in {total_startup:.2f}s total")
-            print(f"[Orchestrator] Music started for session {session_id}")
+            # Relay queued audio to the client in coalesced frames
+            audio_relay.start(name=f"audio-sender-{session_id}")
+            
+            total_startup = (t1 - start_time) / 1e9
+            self._setup_seconds += PREWARM_EWMA_ALPHA * (total_startup - self._setup_seconds)
+            logger.info("[Orchestrator] ✅ Music generation ready in %.2fs total", total_startup)
+            logger.info("[Orchestrator] Music started for session %s", session_id)
             
             # Store session data
-            session = {
-                "session_id": session_id,
-                "video_url": video_url,
-                "video_info": video_info,
-                "composition_context": composition_context,
-                "lyria_connection": lyria_connection,
-                "client_websocket": client_websocket,
-                "session_logger": session_logger,
-                "is_live": video_info["is_live"],
-                "frame_index": 0,
-                "is_active": True,
-                "started_at": datetime.now().timestamp(),
-                "audio_chunks": audio_chunks  # Store reference to audio buffer
-            }
+            session = Session(
+                session_id=session_id,
+                video_url=video_url,
+                video_info=video_info,
+                composition_context=composition_context,
+                lyria_connection=lyria_connection,
+                client_websocket=client_websocket,
+                session_logger=session_logger,
+                is_live=video_info["is_live"],
+                started_at=time.time(),
+                started_monotonic_ns=start_time,
+                audio_relay=audio_relay,
+                frame_session=self.frame_extractor.open(video_url),
+                last_prompt=initial_prompt
+            )
             
             self.active_sessions[session_id] = session
             
-            # Start background processing
-            asyncio.create_task(self._process_video_frames(session))
+            # Start background processing (the session holds the only strong reference,
+            # which keeps the task from being garbage-collected mid-run)
+            session.frames_task = asyncio.create_task(
+                self._process_video_frames(session),
+                name=f"frames-{session_id}"
+            )
             
             return {
                 "success": True,
@@ -165,76 +334,127 @@ class MusicGenerationOrchestrator:
             }
             
         except Exception as e:
-            print(f"[Orchestrator] Error starting music generation: {e}")
+            logger.error("[Orchestrator] Error starting music generation: %s", e)
             raise
     
-    async def _process_video_frames(self, session: dict):
+    async def _get_metadata_prompt(self, video_info: dict) -> str:
+        """Get the initial music prompt for a video, reusing earlier results for the same video."""
+        key = video_info.get("id") or f"{video_info.get('title', '')}|{video_info.get('author', '')}"
+        key = f"{key}|{'live' if video_info.get('is_live') else 'vod'}"
+        
+        cached = self._metadata_prompt_cache.get(key)
+        if cached is not None:
+            self._metadata_prompt_cache.move_to_end(key)
+            logger.info("[Orchestrator] Using cached metadata prompt for %s", key)
+            return cached
+        
+        lock = self._metadata_prompt_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another session may have filled it while we waited
+            cached = self._metadata_prompt_cache.get(key)
+            if cached is not None:
+                self._metadata_prompt_cache.move_to_end(key)
+                return cached
+            
+            try:
+                metadata_prompt = await self.gemini_analyzer.analyze_video_metadata(video_info)
+            finally:
+                self._metadata_prompt_locks.pop(key, None)
+            
+            # Don't remember the generic fallback - the next session should retry Gemini
+            if metadata_prompt != DEFAULT_METADATA_PROMPT:
+                self._metadata_prompt_cache[key] = metadata_prompt
+                if len(self._metadata_prompt_cache) > METADATA_PROMPT_CACHE_SIZE:
+                    self._metadata_prompt_cache.popitem(last=False)
+            
+            return metadata_prompt
+    
+    async def _process_video_frames(self, session: Session):
         """
         Process video frames in the background.
         Different strategy for livestreams vs recorded videos.
         """
-        session_id = session["session_id"]
+        session_id = session.session_id
         
         try:
-            if session["is_live"]:
+            if session.is_live:
                 await self._process_livestream(session)
             else:
                 await self._process_recorded_video(session)
         except Exception as e:
-            print(f"[Orchestrator] Error processing frames for session {session_id}: {e}")
+            logger.error("[Orchestrator] Error processing frames for session %s: %s", session_id, e)
     
-    async def _process_livestream(self, session: dict):
+    async def _process_livestream(self, session: Session):
         """Process livestream with periodic snapshots."""
-        session_id = session["session_id"]
-        video_url = session["video_url"]
-        composition_context = session["composition_context"]
-        lyria_connection = session["lyria_connection"]
-        session_logger = session["session_logger"]
+        session_id = session.session_id
+        video_url = session.video_url
+        composition_context = session.composition_context
+        session_logger = session.session_logger
         
-        print(f"[Orchestrator] Starting livestream processing for {session_id}")
+        logger.info("[Orchestrator] Starting livestream processing for %s", session_id)
         
-        previous_frame = None
+        frame_session = session.frame_session
+        previous_frame = None  # Last analyzed frame, Gemini's "before" image
         frame_count = 0
+        miss_streak = 0  # Polls in a row without a significant change
         
-        while session["is_active"]:
+        loop = asyncio.get_running_loop()
+        
+        while session.is_active:
+            # Polls are paced from when they start, so the time spent grabbing and
+            # analyzing a frame counts toward the wait instead of adding to it
+            poll_start = loop.time()
             try:
-                # Extract current frame
-                current_frame = await self.frame_extractor.extract_livestream_frame(video_url)
+                # Poll with a cheap raw-gray thumbnail grab; if that fails, derive the
+                # thumbnail from a full frame instead
+                current_frame = None
+                current_thumbnail = await self.frame_extractor.peek_livestream(video_url)
+                if current_thumbnail is None:
+                    current_frame = await self.frame_extractor.extract_livestream_frame(video_url)
+                    current_thumbnail = await self._run_cpu(self.frame_extractor.make_thumbnail, current_frame)
                 frame_count += 1
                 
+                # Compare against this stream's last significant frame (not just the
+                # previous poll), so slow drift adds up to a change too
+                is_significant = await self._run_cpu(frame_session.is_significant_change, current_thumbnail)
+                
+                miss_streak = 0 if is_significant else miss_streak + 1
+                
+                if not is_significant:
+                    await asyncio.sleep(poll_start + self._livestream_poll_interval(miss_streak) - loop.time())
+                    continue
+                
+                # Only pay for the full frame when there's something to analyze
+                if current_frame is None:
+                    current_frame = await self.frame_extractor.extract_livestream_frame(video_url)
+                
                 if previous_frame:
-                    # Compare frames
-                    is_significant = await self.frame_extractor.is_significant_change(current_frame)
+                    logger.debug("[Orchestrator] Significant change detected in livestream %s", session_id)
+                    logger.debug("[Orchestrator] Querying Gemini for frame delta analysis...")
                     
-                    if is_significant:
-                        print(f"[Orchestrator] Significant change detected in livestream {session_id}")
-                        print(f"[Orchestrator] Querying Gemini for frame delta analysis...")
-                        
-                        # Analyze the change
-                        delta_analysis = await self.gemini_analyzer.analyze_frame_delta(
-                            previous_frame,
-                            current_frame,
-                            composition_context
-                        )
-                        
-                        # Log the analysis
-                        session_logger.log_frame_analysis(frame_count, "Livestream Delta", delta_analysis["analysis"])
-                        
-                        print(f"[Orchestrator] Received analysis from Gemini (needs_change={delta_analysis['needs_change']})")
+                    # Analyze the change
+                    delta_analysis = await self.gemini_analyzer.submit_delta(
+                        previous_frame,
+                        current_frame,
+                        composition_context
+                    )
+                    
+                    # Log the analysis
+                    session_logger.log_frame_analysis(frame_count, "Livestream Delta", delta_analysis["analysis"])
+                    
+                    logger.debug("[Orchestrator] Received analysis from Gemini (needs_change=%s)", delta_analysis['needs_change'])
+                    
+                    if delta_analysis["needs_change"]:
+                        # Update composition context
+                        composition_context.update_from_analysis(delta_analysis["analysis"])
                         
-                        if delta_analysis["needs_change"]:
-                            # Update composition context
-                            composition_context.update_from_analysis(delta_analysis["analysis"])
-                            
-                            # Generate and send new prompt to Lyria
-                            new_prompt = composition_context.generate_lyria_prompt(delta_analysis["analysis"])
-                            await lyria_connection.update_prompt(new_prompt)
-                            
-                            session_logger.log_prompt_update(new_prompt)
-                            print(f"[Orchestrator] Updated Lyria prompt for {session_id}")
+                        # Generate and send new prompt to Lyria
+                        new_prompt = composition_context.generate_lyria_prompt(delta_analysis["analysis"])
+                        if await self._update_prompt(session, new_prompt, skip_similar=True):
+                            logger.info("[Orchestrator] Updated Lyria prompt for %s", session_id)
                 else:
                     # First frame - full analysis
-                    print(f"[Orchestrator] Analyzing initial livestream frame")
+                    logger.info("[Orchestrator] Analyzing initial livestream frame")
                     analysis = await self.gemini_analyzer.analyze_frame(current_frame, composition_context)
                     
                     # Log the analysis
@@ -243,29 +463,31 @@ class MusicGenerationOrchestrator:
                     composition_context.update_from_analysis(analysis["composition_notes"])
                     
                     new_prompt = composition_context.generate_lyria_prompt(analysis["composition_notes"])
-                    await lyria_connection.update_prompt(new_prompt)
+                    await self._update_prompt(session, new_prompt)
                     
-                    session_logger.log_prompt_update(new_prompt)
-                    print(f"[Orchestrator] Initial frame analysis complete for {session_id}")
+                    logger.info("[Orchestrator] Initial frame analysis complete for %s", session_id)
                 
                 previous_frame = current_frame
                 
-                # Wait before next snapshot
-                await asyncio.sleep(self.frame_extractor.livestream_interval)
+                # Wait before next snapshot (longer while the stream stays static)
+                await asyncio.sleep(poll_start + self._livestream_poll_interval(miss_streak) - loop.time())
                 
             except Exception as e:
-                print(f"[Orchestrator] Error in livestream processing for {session_id}: {e}")
-                await asyncio.sleep(self.frame_extractor.livestream_interval)
+                logger.error("[Orchestrator] Error in livestream processing for %s: %s", session_id, e)
+                await asyncio.sleep(poll_start + self.frame_extractor.livestream_interval - loop.time())
     
-    async def _process_recorded_video(self, session: dict):
+    def _livestream_poll_interval(self, miss_streak: int) -> float:
+        """Seconds until the next livestream poll: base interval, doubled per quiet poll, capped."""
+        base = self.frame_extractor.livestream_interval
+        return min(base * 2 ** min(miss_streak, 8), max(base, LIVESTREAM_MAX_INTERVAL_SECONDS))
+    
+    async def _process_recorded_video(self, session: Session):
         """Process recorded video with sequential playback tracking."""
-        session_id = session["session_id"]
-        video_url = session["video_url"]
-        video_info = session["video_info"]
-        composition_context = session["composition_context"]
-        lyria_connection = session["lyria_connection"]
+        session_id = session.session_id
+        video_url = session.video_url
+        video_info = session.video_info
         
-        print(f"[Orchestrator] Starting recorded video processing for {session_id}")
+        logger.info("[Orchestrator] Starting recorded video processing for %s", session_id)
         
         # Configuration for frame processing timing
         first_frame_offset = 10  # Process first frame for 10s mark in video (gives time for initial music)
@@ -273,148 +495,308 @@ class MusicGenerationOrchestrator:
         processing_buffer = 5  # Start processing N seconds before the frame's video time
         
         duration = video_info["duration"]
-        print(f"[Orchestrator] Frame schedule: First frame at {first_frame_offset}s, then every {frame_interval}s")
-        print(f"[Orchestrator] Processing buffer: {processing_buffer}s before each frame's video time")
-        
-        previous_frame = None
+        logger.info("[Orchestrator] Frame schedule: First frame at %ss, then every %ss", first_frame_offset, frame_interval)
+        logger.info("[Orchestrator] Processing buffer: %ss before each frame's video time", processing_buffer)
+        
+        # Last frame Gemini analyzed (what the music currently reflects) - the
+        # "before" image for the next delta, and its small grayscale copy the
+        # reference for drift
+        anchor_frame = None
+        anchor_thumbnail = None
+        last_analysis_ns = 0
+        unchanged_streak = 0  # Consecutive delta analyses that left the music as is
         frame_count = 0
         
-        # Store playback start time to track real-time alignment
-        playback_start_time = datetime.now()
-        session["playback_start_time"] = playback_start_time
-        print(f"[Orchestrator] 🎬 Video playback started at {playback_start_time.strftime('%H:%M:%S.%f')[:-3]}")
+        # Gemini analysis + Lyria update for the last frame, overlapped with extracting the next
+        pending_analysis: Optional[asyncio.Task] = None
         
-        # Calculate playback offset for first frame
-        playback_offset = first_frame_offset
-        session["playback_offset"] = playback_offset
+        # Offsets come from the real-time schedule (which also follows seeks); the
+        # extractor resolves the video's stream once and reuses it for every frame
+        schedule = self._recorded_frame_schedule(
+            session, first_frame_offset, frame_interval, processing_buffer, duration
+        )
+        frame_start = time.monotonic_ns()
         
-        while session["is_active"] and playback_offset < duration:
-            try:
-                # Calculate when we should START processing this frame
-                # (processing_buffer seconds before the frame's video timestamp)
-                target_processing_time = playback_offset - processing_buffer
-                
-                # Wait until it's time to process this frame
-                real_time_elapsed = (datetime.now() - playback_start_time).total_seconds()
-                wait_time = target_processing_time - real_time_elapsed
-                
-                if wait_time > 0:
-                    print(f"[Orchestrator] ⏸️  Waiting {wait_time:.1f}s before processing frame at {playback_offset}s (scheduled for {target_processing_time:.1f}s real-time)")
-                    await asyncio.sleep(wait_time)
+        # Extraction runs in its own task, so the next frame is fetched as soon as it's
+        # due even while this loop is still comparing the last one
+        frames = self._prefetch(
+            self.frame_extractor.extract_frames_batch(video_url, schedule), FRAME_PREFETCH_DEPTH
+        )
+        
+        try:
+            async for playback_offset, current_frame in frames:
+                try:
+                    t1 = time.monotonic_ns()
                     
-                    # Check if playback_offset was updated during the wait (user scrubbed)
-                    current_offset = session["playback_offset"]
-                    if current_offset != playback_offset:
-                        print(f"[Orchestrator] 🔄 Offset changed during wait: {playback_offset}s → {current_offset}s, recalculating...")
-                        playback_offset = current_offset
-                        playback_start_time = session["playback_start_time"]
-                        continue  # Skip this iteration and recalculate wait time
-                
-                frame_start = datetime.now()
-                
-                # Extract frame at current playback position
-                t0 = datetime.now()
-                current_frame = await self.frame_extractor.extract_frame(video_url, playback_offset)
-                t1 = datetime.now()
-                
-                # Calculate real-time elapsed since playback started
-                real_time_elapsed = (t1 - playback_start_time).total_seconds()
-                time_delta = real_time_elapsed - playback_offset  # How far behind/ahead we are
-                
-                print(f"[Orchestrator] ⏱️  Frame {frame_count + 1} extracted in {(t1-t0).total_seconds():.2f}s (playback: {playback_offset}s / {duration}s)")
-                print(f"[Orchestrator] 📊 Real-time: {real_time_elapsed:.1f}s | Video time: {playback_offset}s | Delta: {time_delta:+.1f}s")
-                
-                if previous_frame:
-                    # Compare frames
-                    t0 = datetime.now()
-                    difference = await self.frame_extractor.compare_frames(previous_frame, current_frame)
-                    t1 = datetime.now()
+                    # Calculate real-time elapsed since playback started
+                    real_time_elapsed = (t1 - session.playback_start_ns) / 1e9
+                    time_delta = real_time_elapsed - playback_offset  # How far behind/ahead we are
+                    
+                    logger.debug("[Orchestrator] ⏱️  Frame %s extracted (playback: %ss / %ss)", frame_count + 1, playback_offset, duration)
+                    logger.debug("[Orchestrator] 📊 Real-time: %.1fs | Video time: %ss | Delta: %+.1fs", real_time_elapsed, playback_offset, time_delta)
+                    
+                    current_thumbnail = await self._run_cpu(self.frame_extractor.make_thumbnail, current_frame)
                     
-                    if difference > self.frame_extractor.frame_diff_threshold:
-                        print(f"[Orchestrator] Scene change detected at {playback_offset}s (diff: {difference:.1f}%)")
+                    # Collect the previous analysis if it has landed
+                    if pending_analysis and pending_analysis.done():
+                        needs_change = pending_analysis.result()
+                        pending_analysis = None
                         
-                        # Query Gemini for analysis
-                        print(f"[Orchestrator] Querying Gemini for frame delta analysis...")
-                        t0 = datetime.now()
-                        delta_analysis = await self.gemini_analyzer.analyze_frame_delta(
-                            previous_frame,
-                            current_frame,
-                            composition_context
+                        if needs_change is False:
+                            unchanged_streak += 1
+                        elif needs_change:
+                            unchanged_streak = 0
+                    
+                    analysis_step = None
+                    
+                    if anchor_frame:
+                        # Check how far we've drifted from what Gemini last saw (below the low
+                        # band it's camera noise) and only re-analyze past the high band
+                        drift = await self._run_cpu(
+                            self.frame_extractor.drift_from_anchor, anchor_thumbnail, current_thumbnail
                         )
-                        t1 = datetime.now()
-                        print(f"[Orchestrator] ⏱️  Gemini delta analysis completed in {(t1-t0).total_seconds():.2f}s")
-                        
-                        # Log to session file
-                        session_logger = session["session_logger"]
-                        session_logger.log_frame_analysis(playback_offset, "Delta Analysis", delta_analysis["analysis"])
+                        since_analysis = (time.monotonic_ns() - last_analysis_ns) / 1e9
                         
-                        print(f"[Orchestrator] Received analysis from Gemini (needs_change={delta_analysis['needs_change']})")
-                        
-                        if delta_analysis["needs_change"]:
-                            t0 = datetime.now()
-                            composition_context.update_from_analysis(delta_analysis["analysis"])
-                            
-                            new_prompt = composition_context.generate_lyria_prompt(delta_analysis["analysis"])
-                            await lyria_connection.update_prompt(new_prompt)
-                            t1 = datetime.now()
-                            print(f"[Orchestrator] ⏱️  Prompt updated in {(t1-t0).total_seconds():.2f}s")
-                            
-                            session_logger.log_prompt_update(new_prompt)
-                            print(f"[Orchestrator] Updated composition at {playback_offset}s")
-                else:
-                    # First frame
-                    print(f"[Orchestrator] Analyzing initial frame at {playback_offset}s")
-                    t0 = datetime.now()
-                    analysis = await self.gemini_analyzer.analyze_frame(current_frame, composition_context)
-                    t1 = datetime.now()
-                    print(f"[Orchestrator] ⏱️  Initial frame analysis completed in {(t1-t0).total_seconds():.2f}s")
+                        if drift is not None and drift > self._backoff_threshold(unchanged_streak) and since_analysis >= MIN_ANALYSIS_SPACING_SECONDS:
+                            if pending_analysis:
+                                # One analysis per session at a time; the anchor stays put, so
+                                # if the scene still differs it's picked up on a later frame
+                                logger.debug("[Orchestrator] Analysis still running, skipping scene change at %ss", playback_offset)
+                            else:
+                                logger.debug("[Orchestrator] Scene change detected at %ss (diff: %.1f%%)", playback_offset, drift * 100)
+                                analysis_step = self._analyze_recorded_delta(
+                                    session, anchor_frame, current_frame, playback_offset
+                                )
+                    else:
+                        # First frame
+                        analysis_step = self._analyze_recorded_initial(session, current_frame, playback_offset)
                     
-                    # Log to session file
-                    session_logger = session["session_logger"]
-                    session_logger.log_frame_analysis(playback_offset, "Initial Analysis", analysis["composition_notes"])
+                    if analysis_step:
+                        anchor_frame = current_frame
+                        anchor_thumbnail = current_thumbnail
+                        last_analysis_ns = time.monotonic_ns()
                     
-                    t0 = datetime.now()
-                    composition_context.update_from_analysis(analysis["composition_notes"])
+                    # Gemini + Lyria updates run in the background while frame sampling goes
+                    # on; with at most one in flight, prompt updates still reach Lyria in order
+                    if analysis_step:
+                        pending_analysis = asyncio.create_task(analysis_step, name=f"analysis-{session_id}")
                     
-                    new_prompt = composition_context.generate_lyria_prompt(analysis["composition_notes"])
-                    await lyria_connection.update_prompt(new_prompt)
-                    t1 = datetime.now()
-                    print(f"[Orchestrator] ⏱️  Initial prompt updated in {(t1-t0).total_seconds():.2f}s")
+                    frame_count += 1
                     
-                    session_logger.log_prompt_update(new_prompt)
-                    print(f"[Orchestrator] Initial analysis complete for {session_id}")
-                
-                previous_frame = current_frame
+                    frame_total = (time.monotonic_ns() - t1) / 1e9
+                    logger.debug("[Orchestrator] ⏱️  Processed frame %s in %.2fs", frame_count, frame_total)
+                    
+                except Exception as e:
+                    logger.error("[Orchestrator] Error processing frame at %ss: %s", playback_offset, e)
+        finally:
+            if pending_analysis:
+                await pending_analysis
+        
+        logger.info(
+            "[Orchestrator] ✅ Finished processing %s frames for %s in %.0fs (reached %ss / %ss)",
+            frame_count, session_id, (time.monotonic_ns() - frame_start) / 1e9, session.playback_offset, duration
+        )
+    
+    async def _prefetch(self, source: AsyncIterator, depth: int) -> AsyncIterator:
+        """Drive an async iterator from a background task, buffering up to depth items ahead."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+        
+        async def produce():
+            try:
+                async for item in source:
+                    await queue.put((item, None))
+            except Exception as e:
+                await queue.put((_PREFETCH_END, e))
+                return
+            await queue.put((_PREFETCH_END, None))
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item, error = await queue.get()
+                if error is not None:
+                    raise error
+                if item is _PREFETCH_END:
+                    return
+                yield item
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+    
+    def _backoff_threshold(self, unchanged_streak: int) -> float:
+        """Scene-change threshold, raised while Gemini keeps finding the music already fits."""
+        threshold = self.frame_extractor.frame_diff_threshold
+        if unchanged_streak < ANALYSIS_BACKOFF_AFTER:
+            return threshold
+        
+        backed_off = threshold * ANALYSIS_BACKOFF_FACTOR ** (unchanged_streak - ANALYSIS_BACKOFF_AFTER + 1)
+        return max(threshold, min(backed_off, ANALYSIS_BACKOFF_MAX_THRESHOLD))
+    
+    async def _recorded_frame_schedule(
+        self,
+        session: Session,
+        first_frame_offset: float,
+        frame_interval: float,
+        processing_buffer: float,
+        duration: float
+    ):
+        """
+        Yield the playback offsets to sample, each released processing_buffer seconds
+        before the video reaches it. Seeks (session.playback_offset changes) re-plan
+        the schedule, both while waiting and while the last frame was being extracted.
+        """
+        # Store playback start time to track real-time alignment
+        session.playback_start_ns = time.monotonic_ns()
+        logger.info("[Orchestrator] 🎬 Video playback started at %s", datetime.now().strftime('%H:%M:%S.%f')[:-3])
+        
+        # Calculate playback offset for first frame
+        playback_offset = first_frame_offset
+        session.playback_offset = playback_offset
+        
+        while session.is_active and playback_offset < duration:
+            # Calculate when we should START processing this frame
+            # (processing_buffer seconds before the frame's video timestamp)
+            target_processing_time = playback_offset - processing_buffer
+            
+            # Wait until it's time to process this frame
+            real_time_elapsed = (time.monotonic_ns() - session.playback_start_ns) / 1e9
+            wait_time = target_processing_time - real_time_elapsed
+            
+            if wait_time > 0:
+                logger.debug("[Orchestrator] ⏸️  Waiting %.1fs before processing frame at %ss (scheduled for %.1fs real-time)", wait_time, playback_offset, target_processing_time)
                 
-                frame_total = (datetime.now() - frame_start).total_seconds()
-                print(f"[Orchestrator] ⏱️  Total time for frame {frame_count + 1}: {frame_total:.2f}s")
+                # Sleep until the scheduled time, but wake immediately on seek or stop
+                scrub_event = session.scrub_event
+                scrub_event.clear()
+                try:
+                    await asyncio.wait_for(scrub_event.wait(), timeout=wait_time)
+                except asyncio.TimeoutError:
+                    pass
                 
-                # Check if offset was updated during frame processing (user scrubbed)
-                current_offset = session["playback_offset"]
+                # Check if playback_offset was updated during the wait (user scrubbed)
+                current_offset = session.playback_offset
                 if current_offset != playback_offset:
-                    print(f"[Orchestrator] 🔄 Offset changed during processing: {playback_offset}s → {current_offset}s, jumping to new position")
+                    logger.info("[Orchestrator] 🔄 Offset changed during wait: %ss → %ss, recalculating...", playback_offset, current_offset)
                     playback_offset = current_offset
-                    playback_start_time = session["playback_start_time"]  # Use new timeline
-                    frame_count += 1
-                    # Don't continue here - let it calculate next frame position first
+                    continue  # Recalculate wait time against the new timeline
                 
-                # Move to next playback position (unless we just jumped from a seek)
-                if current_offset == playback_offset:
-                    # Normal increment - no seek happened
-                    playback_offset += frame_interval
-                    session["playback_offset"] = playback_offset
-                    frame_count += 1
-                else:
-                    # We just jumped from a seek, calculate next frame from new position
-                    playback_offset = current_offset + frame_interval
-                    session["playback_offset"] = playback_offset
+                if scrub_event.is_set():
+                    # Woken early without an offset change (seek to same spot or stop)
+                    continue
+            
+            if not session.is_active:
+                break
+            
+            # Hand this offset to the extractor; with prefetching we resume as soon as
+            # its frame is extracted and queued, not when the frame has been processed
+            yield playback_offset
+            
+            # Check if offset was updated during extraction (user scrubbed)
+            current_offset = session.playback_offset
+            if current_offset != playback_offset:
+                logger.info("[Orchestrator] 🔄 Offset changed during extraction: %ss → %ss, jumping to new position", playback_offset, current_offset)
+            
+            # Next frame is one interval past wherever playback is now
+            playback_offset = current_offset + frame_interval
+            session.playback_offset = playback_offset
+    
+    async def _analyze_recorded_delta(
+        self,
+        session: Session,
+        previous_frame: bytes,
+        current_frame: bytes,
+        playback_offset: float
+    ) -> Optional[bool]:
+        """
+        Analyze a scene change with Gemini and update the Lyria prompt if needed.
+        Returns whether Gemini asked for a change (None if the analysis failed).
+        """
+        composition_context = session.composition_context
+        session_logger = session.session_logger
+        
+        try:
+            # Query Gemini for analysis
+            logger.debug("[Orchestrator] Querying Gemini for frame delta analysis...")
+            t0 = time.monotonic_ns()
+            delta_analysis = await self.gemini_analyzer.submit_delta(
+                previous_frame,
+                current_frame,
+                composition_context
+            )
+            t1 = time.monotonic_ns()
+            logger.debug("[Orchestrator] ⏱️  Gemini delta analysis completed in %.2fs", (t1 - t0) / 1e9)
+            
+            # Log to session file
+            session_logger.log_frame_analysis(playback_offset, "Delta Analysis", delta_analysis["analysis"])
+            
+            logger.debug("[Orchestrator] Received analysis from Gemini (needs_change=%s)", delta_analysis['needs_change'])
+            
+            if delta_analysis["needs_change"] and session.is_active:
+                t0 = time.monotonic_ns()
+                composition_context.update_from_analysis(delta_analysis["analysis"])
                 
-                # No fixed sleep - we'll wait at the start of next iteration based on scheduled time
+                new_prompt = composition_context.generate_lyria_prompt(delta_analysis["analysis"])
+                if await self._update_prompt(session, new_prompt, skip_similar=True):
+                    t1 = time.monotonic_ns()
+                    logger.debug("[Orchestrator] ⏱️  Prompt updated in %.2fs", (t1 - t0) / 1e9)
+                    logger.info("[Orchestrator] Updated composition at %ss", playback_offset)
+            
+            return delta_analysis["needs_change"]
                 
-            except Exception as e:
-                print(f"[Orchestrator] Error processing frame at {playback_offset}s: {e}")
+        except Exception as e:
+            logger.error("[Orchestrator] Error analyzing frame at %ss: %s", playback_offset, e)
+            return None
+    
+    async def _analyze_recorded_initial(self, session: Session, current_frame: bytes, playback_offset: float):
+        """Run the full Gemini analysis for the first frame and set the Lyria prompt."""
+        session_id = session.session_id
+        composition_context = session.composition_context
+        session_logger = session.session_logger
+        
+        try:
+            logger.info("[Orchestrator] Analyzing initial frame at %ss", playback_offset)
+            t0 = time.monotonic_ns()
+            analysis = await self.gemini_analyzer.analyze_frame(current_frame, composition_context)
+            t1 = time.monotonic_ns()
+            logger.debug("[Orchestrator] ⏱️  Initial frame analysis completed in %.2fs", (t1 - t0) / 1e9)
+            
+            # Log to session file
+            session_logger.log_frame_analysis(playback_offset, "Initial Analysis", analysis["composition_notes"])
+            
+            if not session.is_active:
+                return
+            
+            t0 = time.monotonic_ns()
+            composition_context.update_from_analysis(analysis["composition_notes"])
+            
+            new_prompt = composition_context.generate_lyria_prompt(analysis["composition_notes"])
+            await self._update_prompt(session, new_prompt)
+            t1 = time.monotonic_ns()
+            logger.debug("[Orchestrator] ⏱️  Initial prompt updated in %.2fs", (t1 - t0) / 1e9)
+            logger.info("[Orchestrator] Initial analysis complete for %s", session_id)
+            
+        except Exception as e:
+            logger.error("[Orchestrator] Error analyzing initial frame at %ss: %s", playback_offset, e)
+    
+    async def _update_prompt(self, session: Session, new_prompt: str, skip_similar: bool = False) -> bool:
+        """
+        Send a new prompt to Lyria and log it.
         
-        print(f"[Orchestrator] ✅ Finished processing {frame_count} frames for {session_id} (reached {playback_offset}s / {duration}s)")
+        With skip_similar, a prompt nearly identical to the one already playing is
+        dropped instead (scene analyses often reword the same music). Returns
+        whether the prompt was sent.
+        """
+        if skip_similar and session.last_prompt is not None:
+            similarity = _prompt_similarity(session.last_prompt, new_prompt)
+            if similarity >= PROMPT_SKIP_SIMILARITY:
+                session.session_logger.log_event(f"Prompt update skipped ({similarity:.0%} similar to current prompt)")
+                logger.debug("[Orchestrator] Skipping near-identical prompt update for %s", session.session_id)
+                return False
+        
+        await session.lyria_connection.update_prompt(new_prompt)
+        session.last_prompt = new_prompt
+        session.session_logger.log_prompt_update(new_prompt)
+        return True
     
     async def handle_user_prompt(self, session_id: str, user_prompt: str) -> dict:
         """Handle user prompt."""
@@ -423,11 +805,10 @@ class MusicGenerationOrchestrator:
         if not session:
             raise Exception(f"Session {session_id} not found")
         
-        print(f'[Orchestrator] User prompt for {session_id}: "{user_prompt}"')
+        logger.info('[Orchestrator] User prompt for %s: "%s"', session_id, user_prompt)
         
-        composition_context = session["composition_context"]
-        lyria_connection = session["lyria_connection"]
-        session_logger = session["session_logger"]
+        composition_context = session.composition_context
+        session_logger = session.session_logger
         
         # Log user prompt
         session_logger.log_user_prompt(user_prompt)
@@ -437,10 +818,8 @@ class MusicGenerationOrchestrator:
         
         # Generate new prompt with user input
         new_prompt = composition_context.generate_lyria_prompt(user_prompt)
-        await lyria_connection.update_prompt(new_prompt)
-        
-        session_logger.log_prompt_update(new_prompt)
-        print(f"[Orchestrator] User prompt applied to {session_id}")
+        await self._update_prompt(session, new_prompt)
+        logger.info("[Orchestrator] User prompt applied to %s", session_id)
         
         return {"success": True, "message": "Prompt applied"}
     
@@ -461,22 +840,22 @@ class MusicGenerationOrchestrator:
         if not session:
             raise Exception(f"Session {session_id} not found")
         
-        old_offset = session.get("playback_offset", 0)
-        print(f"[Orchestrator] 🎯 Playback offset updated for {session_id}: {old_offset}s → {new_offset}s")
+        old_offset = session.playback_offset
+        logger.info("[Orchestrator] 🎯 Playback offset updated for %s: %ss → %ss", session_id, old_offset, new_offset)
         
         # Update playback offset and adjust timeline
-        # Set playback_start_time so that "now" corresponds to new_offset
+        # Set playback_start_ns so that "now" corresponds to new_offset
         # This maintains the relationship: real_time_elapsed = video_offset
-        from datetime import timedelta
-        session["playback_offset"] = new_offset
-        session["playback_start_time"] = datetime.now() - timedelta(seconds=new_offset)
+        session.playback_offset = new_offset
+        session.playback_start_ns = time.monotonic_ns() - int(new_offset * 1e9)
+        
+        # Wake the frame scheduler so it re-plans against the new timeline right away
+        session.scrub_event.set()
         
         # Log the scrubbing event
-        session_logger = session.get("session_logger")
-        if session_logger:
-            session_logger.log_event(f"User scrubbed: {old_offset}s → {new_offset}s")
+        session.session_logger.log_event(f"User scrubbed: {old_offset}s → {new_offset}s")
         
-        print(f"[Orchestrator] Timeline adjusted - frame processing will continue from {new_offset}s")
+        logger.info("[Orchestrator] Timeline adjusted - frame processing will continue from %ss", new_offset)
         
         return {
             "success": True,
@@ -485,15 +864,19 @@ class MusicGenerationOrchestrator:
             "new_offset": new_offset
         }
     
-    def export_audio_as_wav(self, session_id: str) -> bytes:
+    def export_audio_as_wav(self, session_id: str) -> List[bytes]:
         """
         Export all collected audio chunks as a WAV file.
         
+        The WAV is returned as a list of parts (header first, then the PCM slabs
+        as stored) so it can be streamed without concatenating the whole session's
+        audio into a second full-size copy.
+        
         Args:
             session_id: The session identifier
         
         Returns:
-            bytes: WAV file data ready for download
+            List[bytes]: WAV file parts, in order, ready to stream for download
         
         Raises:
             Exception: If session not found or no audio chunks available
@@ -503,105 +886,98 @@ class MusicGenerationOrchestrator:
         if not session:
             raise Exception(f"Session {session_id} not found")
         
-        audio_chunks = session.get("audio_chunks", [])
+        # Snapshot the slabs so audio still arriving for an active session
+        # can't change the data after the header's sizes are computed
+        audio_chunks = session.audio_relay.buffer.snapshot()
         
-        print(f"[Orchestrator] 💾 Session found: {session_id}")
-        print(f"[Orchestrator] 💾 Audio chunks available: {len(audio_chunks)}")
+        logger.info("[Orchestrator] 💾 Session found: %s", session_id)
+        logger.info("[Orchestrator] 💾 Audio slabs available: %s", len(audio_chunks))
         
         if not audio_chunks:
             raise Exception(f"No audio data available for session {session_id}. Music may not have started yet.")
         
-        print(f"[Orchestrator] 💾 Exporting {len(audio_chunks)} audio chunks as WAV for session {session_id}")
+        logger.info("[Orchestrator] 💾 Exporting %s audio slabs as WAV for session %s", len(audio_chunks), session_id)
         
         # Lyria audio format: 48kHz, stereo (2 channels), 16-bit PCM
         # This MUST match what the frontend expects (see index.html handleAudioData)
         sample_rate = 48000
         num_channels = 2
         bits_per_sample = 16
+        byte_rate = sample_rate * num_channels * bits_per_sample // 8
+        block_align = num_channels * bits_per_sample // 8
         
-        # Concatenate all PCM chunks
-        try:
-            pcm_data = b''.join(audio_chunks)
-        except Exception as e:
-            print(f"[Orchestrator] ❌ Error concatenating audio chunks: {e}")
-            raise Exception(f"Failed to concatenate audio chunks: {e}")
-        
-        # Calculate sizes
-        data_size = len(pcm_data)
+        # Calculate sizes (no copy of the PCM data)
+        data_size = sum(map(len, audio_chunks))
         file_size = data_size + 36  # 44 byte header - 8 bytes
         
-        # Build WAV header
-        import struct
-        
-        wav_header = b''
-        wav_header += b'RIFF'  # ChunkID
-        wav_header += struct.pack('<I', file_size)  # ChunkSize
-        wav_header += b'WAVE'  # Format
-        
-        # fmt subchunk
-        wav_header += b'fmt '  # Subchunk1ID
-        wav_header += struct.pack('<I', 16)  # Subchunk1Size (16 for PCM)
-        wav_header += struct.pack('<H', 1)  # AudioFormat (1 for PCM)
-        wav_header += struct.pack('<H', num_channels)  # NumChannels
-        wav_header += struct.pack('<I', sample_rate)  # SampleRate
-        wav_header += struct.pack('<I', sample_rate * num_channels * bits_per_sample // 8)  # ByteRate
-        wav_header += struct.pack('<H', num_channels * bits_per_sample // 8)  # BlockAlign
-        wav_header += struct.pack('<H', bits_per_sample)  # BitsPerSample
-        
-        # data subchunk
-        wav_header += b'data'  # Subchunk2ID
-        wav_header += struct.pack('<I', data_size)  # Subchunk2Size
-        
-        # Combine header + PCM data
-        wav_file = wav_header + pcm_data
+        # Build the 44-byte WAV header: RIFF chunk, fmt subchunk (PCM), data subchunk
+        wav_header = _WAV_HEADER.pack(
+            b'RIFF', file_size, b'WAVE',
+            b'fmt ', 16, 1, num_channels, sample_rate, byte_rate, block_align, bits_per_sample,
+            b'data', data_size
+        )
         
-        duration_seconds = data_size / (sample_rate * num_channels * bits_per_sample // 8)
-        print(f"[Orchestrator] ✅ WAV export complete: {len(wav_file)} bytes, {duration_seconds:.1f}s duration")
+        duration_seconds = data_size / byte_rate
+        logger.info("[Orchestrator] ✅ WAV export ready: %s bytes, %.1fs duration", len(wav_header) + data_size, duration_seconds)
         
-        return wav_file
+        return [wav_header, *audio_chunks]
     
     async def stop_music_generation(self, session_id: str):
         """Stop music generation for a session."""
         session = self.active_sessions.get(session_id)
         
         if not session:
-            print(f"[Orchestrator] Session {session_id} not found")
+            logger.info("[Orchestrator] Session %s not found", session_id)
             return
         
-        print(f"[Orchestrator] Stopping music generation for {session_id}")
+        logger.info("[Orchestrator] Stopping music generation for %s", session_id)
         
-        session["is_active"] = False
+        session.is_active = False
+        
+        # Wake the frame scheduler so it notices the stop instead of sleeping it out
+        session.scrub_event.set()
         
         # Calculate session metrics
-        duration = datetime.now().timestamp() - session.get("started_at", 0)
-        frames_analyzed = session.get("frame_index", 0)
-        user_prompts = len(session.get("composition_context").user_prompts) if session.get("composition_context") else 0
+        duration = (time.monotonic_ns() - session.started_monotonic_ns) / 1e9
+        frames_analyzed = session.frame_index
+        user_prompts = len(session.composition_context.user_prompts)
+        dropped_audio_chunks = session.audio_relay.dropped_chunks
+        
+        if dropped_audio_chunks:
+            logger.warning("[Orchestrator] ⚠️  Dropped %s audio chunks for slow client", dropped_audio_chunks)
         
         # Log session end with metrics
-        if "session_logger" in session:
-            session["session_logger"].log_session_end({
-                "duration": duration,
-                "frames_analyzed": frames_analyzed,
-                "user_prompts": user_prompts
-            })
+        session.session_logger.log_session_end({
+            "duration": duration,
+            "frames_analyzed": frames_analyzed,
+            "user_prompts": user_prompts
+        })
+        await session.session_logger.close()
         
         # Release Lyria connection back to pool
-        await self.lyria_pool.release_connection(session_id)
+        try:
+            await self.lyria_pool.release_connection(session_id)
+        finally:
+            # No more audio is coming; flush what's queued and stop relaying to the
+            # client, even if the release failed
+            await session.audio_relay.close()
+            
+            # If the reset connection didn't come back, top the pool up now rather than
+            # waiting for the next pre-warm tick, so the next session finds one ready
+            self.lyria_pool.ensure_warm(self._prewarm_target())
         
         # DON'T delete the session yet - keep it around so users can download audio
         # Just mark it as stopped
-        session["stopped_at"] = datetime.now().timestamp()
+        session.stopped_at = time.monotonic()
         
         # Note: Session will be cleaned up when client disconnects or explicitly requests cleanup
         
-        self.frame_extractor.reset()
-        
-        print(f"[Orchestrator] Session {session_id} stopped (audio still available for download)")
+        logger.info("[Orchestrator] Session %s stopped (audio still available for download)", session_id)
     
     def cleanup_session(self, session_id: str):
         """Completely remove a session and its data."""
         if session_id in self.active_sessions:
-            print(f"[Orchestrator] Cleaning up session {session_id}")
+            logger.info("[Orchestrator] Cleaning up session %s", session_id)
             del self.active_sessions[session_id]
     
     def get_session_status(self, session_id: str) -> dict:
@@ -613,27 +989,61 @@ class MusicGenerationOrchestrator:
         
         return {
             "exists": True,
-            "session_id": session["session_id"],
-            "video_title": session["video_info"]["title"],
-            "is_live": session["is_live"],
-            "is_active": session["is_active"],
-            "uptime": datetime.now().timestamp() - session["started_at"],
-            "composition_state": session["composition_context"].get_state_summary()
+            "session_id": session.session_id,
+            "video_title": session.video_info["title"],
+            "is_live": session.is_live,
+            "is_active": session.is_active,
+            "uptime": (time.monotonic_ns() - session.started_monotonic_ns) / 1e9,
+            "composition_state": session.composition_context.get_state_summary()
         }
     
     async def shutdown(self):
         """Shutdown orchestrator."""
-        print("[Orchestrator] Shutting down...")
+        logger.info("[Orchestrator] Shutting down...")
+        
+        if self._prewarm_task:
+            self._prewarm_task.cancel()
+        if self._prewarm_videos_task:
+            self._prewarm_videos_task.cancel()
+        
+        # Stop all active sessions (iterate a snapshot - stopping can trigger cleanup_session)
+        stopping: List[Session] = []
+        for session in list(self.active_sessions.values()):
+            if not session.is_active:
+                continue
+            
+            stopping.append(session)
+            session.is_active = False
+            session.scrub_event.set()
+            
+            # These never reach stop_music_generation, so close out their logs here
+            try:
+                session.session_logger.log_session_end({
+                    "duration": (time.monotonic_ns() - session.started_monotonic_ns) / 1e9
+                })
+            except Exception as e:
+                logger.error("[Orchestrator] Error closing log for %s: %s", session.session_id, e)
         
-        # Stop all active sessions
-        for session_id, session in self.active_sessions.items():
-            session["is_active"] = False
+        # Flush every session's logs and audio, stop their Lyria streams and let their
+        # frame loops drain, all concurrently rather than session by session. The
+        # connections are only stopped here, not released: releasing reconnects each
+        # socket, and the pool shutdown below closes them all anyway
+        await asyncio.gather(
+            *(session.audio_relay.close() for session in stopping),
+            *(session.session_logger.close() for session in list(self.active_sessions.values())),
+            *(session.lyria_connection.stop() for session in stopping),
+            *(session.frames_task for session in stopping if session.frames_task),
+            return_exceptions=True
+        )
         
         # Shutdown services
         await asyncio.gather(
             self.lyria_pool.shutdown(),
-            self.frame_extractor.cleanup()
+            self.frame_extractor.cleanup(),
+            self.gemini_analyzer.close()
         )
         
+        self._cpu_executor.shutdown(wait=False, cancel_futures=True)
+        
         self.active_sessions.clear()
-        print("[Orchestrator] Shutdown complete")
+        logger.info("[Orchestrator] Shutdown complete")
@@ -3,10 +3,26 @@ SessionLogger - Per-session logging for Gemini analysis
 
 Creates individual log files for each session to track Gemini's
 frame analysis without cluttering the main server logs.
+
+Entries are queued and written in batches by a background task, so
+logging never puts file I/O on the frame-processing path.
 """
 
+import asyncio
+import os
+import weakref
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+
+# Queued entries are written once this many characters have built up...
+FLUSH_BATCH_CHARS = 4096
+# ...or this long after the first unwritten entry, whichever comes first
+FLUSH_INTERVAL_SECONDS = 0.5
+# Entries allowed to wait for the writer; past this, new entries are dropped
+# rather than letting a stalled disk grow memory without bound
+LOG_QUEUE_MAX_ENTRIES = 1024
 
 
 class SessionLogger:
@@ -20,67 +36,160 @@ class SessionLogger:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.log_file = self.log_dir / f"{timestamp}_{session_id}.txt"
         
+        # Keep the log file open for the whole session instead of reopening it per entry.
+        # Raw descriptor: each batch is encoded once and lands in a single os.write
+        self._fd = os.open(self.log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+        self._finalizer = weakref.finalize(self, os.close, self._fd)
+        
         # Initialize log file (video info will be added via log_session_start)
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            f.write(f"=== Session Started ===\n")
-            f.write(f"Session ID: {session_id}\n")
-            f.write(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self._append(
+            f"=== Session Started ===\n"
+            f"Session ID: {session_id}\n"
+            f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        )
+        
+        # Background writer (only when created inside a running event loop)
+        self._queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=LOG_QUEUE_MAX_ENTRIES)
+        self.dropped_entries = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+        except RuntimeError:
+            pass
+    
+    def _append(self, text: str):
+        """Append text to the log file (blocking)."""
+        data = text.encode('utf-8')
+        
+        if not self._finalizer.alive:
+            # Entry logged after close() - reopen just for this one
+            with open(self.log_file, 'ab') as f:
+                f.write(data)
+            return
+        
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+    
+    def _write(self, text: str):
+        """Queue an entry for the background writer (or write directly if it isn't running)."""
+        if self._flush_task is None or self._flush_task.done():
+            self._append(text)
+            return
+        
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.dropped_entries += 1
+            if self.dropped_entries % 100 == 1:
+                print(f"[SessionLogger] Log writer falling behind for {self.session_id}, dropped {self.dropped_entries} entries")
+    
+    async def _flush_loop(self):
+        """Drain queued entries to disk in batches until close() sends the stop marker."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            
+            parts = [first]
+            size = len(first)
+            deadline = loop.time() + FLUSH_INTERVAL_SECONDS
+            stopping = False
+            
+            while size < FLUSH_BATCH_CHARS:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    part = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if part is None:
+                    stopping = True
+                    break
+                parts.append(part)
+                size += len(part)
+            
+            try:
+                await asyncio.to_thread(self._append, "".join(parts))
+            except Exception as e:
+                print(f"[SessionLogger] Error writing log for {self.session_id}: {e}")
+            
+            if stopping:
+                return
+    
+    async def close(self):
+        """Flush everything queued so far, stop the background writer and close the file."""
+        if self._flush_task is not None and not self._flush_task.done():
+            # Waits for room if the queue is full - the stop marker can't be dropped
+            await self._queue.put(None)
+            await self._flush_task
+        
+        self._finalizer()
     
     def log_session_start(self, video_info: dict, video_url: str):
         """Log session start with video metadata."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"Video: {video_info.get('title', 'Unknown')}\n")
-            f.write(f"URL: {video_url}\n")
-            f.write(f"Duration: {video_info.get('duration', 'Unknown')}s\n")
-            f.write(f"Is Live: {video_info.get('is_live', False)}\n")
-            f.write("=" * 60 + "\n\n")
+        self._write(
+            f"Video: {video_info.get('title', 'Unknown')}\n"
+            f"URL: {video_url}\n"
+            f"Duration: {video_info.get('duration', 'Unknown')}s\n"
+            f"Is Live: {video_info.get('is_live', False)}\n"
+            + "=" * 60 + "\n\n"
+        )
     
     def log_frame_analysis(self, timestamp: float, analysis_type: str, content: str):
         """Log a frame analysis result."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] Frame @ {timestamp}s - {analysis_type}\n")
-            f.write("-" * 60 + "\n")
-            f.write(f"{content}\n")
-            f.write("-" * 60 + "\n")
+        self._write(
+            f"\n[{datetime.now().strftime('%H:%M:%S')}] Frame @ {timestamp}s - {analysis_type}\n"
+            + "-" * 60 + "\n"
+            f"{content}\n"
+            + "-" * 60 + "\n"
+        )
     
     def log_prompt_update(self, prompt: str):
         """Log a prompt update sent to Lyria."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] Prompt Update\n")
-            f.write("-" * 60 + "\n")
-            f.write(f"{prompt}\n")
-            f.write("-" * 60 + "\n")
+        self._write(
+            f"\n[{datetime.now().strftime('%H:%M:%S')}] Prompt Update\n"
+            + "-" * 60 + "\n"
+            f"{prompt}\n"
+            + "-" * 60 + "\n"
+        )
     
     def log_user_prompt(self, user_prompt: str):
         """Log a user-provided prompt."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] USER PROMPT\n")
-            f.write("=" * 60 + "\n")
-            f.write(f"{user_prompt}\n")
-            f.write("=" * 60 + "\n")
+        self._write(
+            f"\n[{datetime.now().strftime('%H:%M:%S')}] USER PROMPT\n"
+            + "=" * 60 + "\n"
+            f"{user_prompt}\n"
+            + "=" * 60 + "\n"
+        )
     
     def log_event(self, event: str):
         """Log a general event (e.g., scrubbing, state changes)."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n[{datetime.now().strftime('%H:%M:%S')}] EVENT: {event}\n")
+        self._write(f"\n[{datetime.now().strftime('%H:%M:%S')}] EVENT: {event}\n")
     
     def log_session_end(self, metrics: dict = None):
         """Log session completion with optional metrics."""
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(f"\n\n=== Session Ended ===\n")
-            f.write(f"Ended: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        lines = [
+            f"\n\n=== Session Ended ===\n",
+            f"Ended: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        ]
+        
+        if metrics:
+            if "duration" in metrics:
+                duration_mins = int(metrics["duration"] // 60)
+                duration_secs = int(metrics["duration"] % 60)
+                lines.append(f"Duration: {duration_mins} minutes, {duration_secs} second{'s' if duration_secs != 1 else ''}\n")
             
-            if metrics:
-                if "duration" in metrics:
-                    duration_mins = int(metrics["duration"] // 60)
-                    duration_secs = int(metrics["duration"] % 60)
-                    f.write(f"Duration: {duration_mins} minutes, {duration_secs} second{'s' if duration_secs != 1 else ''}\n")
-                
-                if "frames_analyzed" in metrics:
-                    f.write(f"Frames analyzed: {metrics['frames_analyzed']}\n")
-                
-                if "user_prompts" in metrics:
-                    f.write(f"User prompts: {metrics['user_prompts']}\n")
+            if "frames_analyzed" in metrics:
+                lines.append(f"Frames analyzed: {metrics['frames_analyzed']}\n")
+            
+            if "user_prompts" in metrics:
+                lines.append(f"User prompts: {metrics['user_prompts']}\n")
+        
+        self._write("".join(lines))
     
     def get_log_path(self) -> str:
         """Get the path to the log file."""
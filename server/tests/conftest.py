@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Services are imported as `services.*`, the same way main.py runs from server/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+from services.audio_buffer import PCMSlabBuffer
+
+
+def test_chunks_are_sealed_into_slabs_without_splitting():
+    buffer = PCMSlabBuffer(slab_size=8)
+
+    for chunk in (b"aaa", b"bbb", b"cc", b"ddd"):
+        buffer.append(chunk)
+
+    assert list(buffer.slabs) == [b"aaabbbcc"]
+    assert bytes(buffer.current) == b"ddd"
+    assert buffer.nbytes == 11
+    assert len(buffer) == 2
+
+
+def test_oversized_chunk_gets_its_own_slab():
+    buffer = PCMSlabBuffer(slab_size=4)
+
+    buffer.append(b"ab")
+    buffer.append(b"0123456789")
+    buffer.append(b"cd")
+
+    assert list(buffer.slabs) == [b"ab", b"0123456789"]
+    assert b"".join(buffer.snapshot()) == b"ab0123456789cd"
+
+
+def test_snapshot_is_unaffected_by_later_appends():
+    buffer = PCMSlabBuffer(slab_size=4)
+    buffer.append(b"abcd")
+    buffer.append(b"ef")
+
+    snapshot = buffer.snapshot()
+    buffer.append(b"gh")
+
+    assert snapshot == [b"abcd", b"ef"]
+    assert snapshot[0] is buffer.slabs[0]
+    assert buffer.snapshot() == [b"abcd", b"efgh"]
+
+
+def test_empty_buffer_snapshot():
+    buffer = PCMSlabBuffer()
+
+    assert buffer.snapshot() == []
+    assert buffer.nbytes == 0
+    assert len(buffer) == 0
+
+
+def test_byte_cap_rolls_oldest_slabs_out():
+    buffer = PCMSlabBuffer(slab_size=4, max_bytes=12)
+
+    for chunk in (b"aaaa", b"bbbb", b"cccc", b"dddd", b"ee"):
+        buffer.append(chunk)
+
+    # Sealed slabs plus a full slab in progress stay within the cap
+    assert list(buffer.slabs) == [b"cccc", b"dddd"]
+    assert bytes(buffer.current) == b"ee"
+    assert buffer.dropped_bytes == 8
+    assert buffer.nbytes == 10
+    assert b"".join(buffer.snapshot()) == b"ccccddddee"
+
+
+def test_uncapped_buffer_keeps_everything():
+    buffer = PCMSlabBuffer(slab_size=4)
+
+    for _ in range(100):
+        buffer.append(b"abcd")
+
+    assert buffer.nbytes == 400
+    assert buffer.dropped_bytes == 0
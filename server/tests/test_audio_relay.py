@@ -0,0 +1,111 @@
+import asyncio
+
+from services.audio_buffer import PCMSlabBuffer
+from services.audio_relay import (
+    AUDIO_QUEUE_HIGH_WATERMARK,
+    AUDIO_QUEUE_MAX_CHUNKS,
+    AudioRelay,
+)
+
+
+class _Client:
+    def __init__(self):
+        self.frames = []
+
+    async def send_bytes(self, data):
+        self.frames.append(data)
+
+
+class _Lyria:
+    def __init__(self):
+        self.paused = 0
+        self.resumed = 0
+
+    def pause_audio(self):
+        self.paused += 1
+
+    def resume_audio(self):
+        self.resumed += 1
+
+
+def _relay():
+    return AudioRelay(_Client(), _Lyria(), PCMSlabBuffer())
+
+
+def test_full_queue_drops_the_oldest_chunk():
+    relay = _relay()
+
+    async def run():
+        for i in range(AUDIO_QUEUE_MAX_CHUNKS + 1):
+            await relay.on_audio_data(i.to_bytes(2, "big"))
+
+    asyncio.run(run())
+
+    assert relay.dropped_chunks == 1
+    assert relay.queue.qsize() == AUDIO_QUEUE_MAX_CHUNKS
+    assert relay.queue.get_nowait() == (1).to_bytes(2, "big")
+    # The download buffer keeps everything, dropped or not
+    assert relay.buffer.nbytes == 2 * (AUDIO_QUEUE_MAX_CHUNKS + 1)
+
+
+def test_lyria_is_paused_at_the_high_watermark():
+    relay = _relay()
+
+    async def run():
+        for _ in range(AUDIO_QUEUE_HIGH_WATERMARK - 1):
+            await relay.on_audio_data(b"ab")
+        assert relay.lyria_connection.paused == 0
+
+        await relay.on_audio_data(b"ab")
+
+    asyncio.run(run())
+
+    assert relay.lyria_connection.paused == 1
+
+
+def test_sender_resumes_lyria_and_coalesces_chunks():
+    relay = _relay()
+
+    async def run():
+        for _ in range(AUDIO_QUEUE_HIGH_WATERMARK):
+            await relay.on_audio_data(b"ab")
+        relay.start()
+        while not relay.client_websocket.frames:
+            await asyncio.sleep(0.01)
+        await relay.close()
+
+    asyncio.run(run())
+
+    assert relay.lyria_connection.resumed >= 1
+    assert b"".join(relay.client_websocket.frames) == b"ab" * AUDIO_QUEUE_HIGH_WATERMARK
+    assert len(relay.client_websocket.frames) == 1
+
+
+def test_close_flushes_queued_audio():
+    relay = _relay()
+
+    async def run():
+        await relay.on_audio_data(b"one")
+        await relay.on_audio_data(b"two")
+        await relay.close()
+
+    asyncio.run(run())
+
+    assert relay.client_websocket.frames == [b"onetwo"]
+
+
+def test_close_sends_chunks_the_sender_is_still_collecting():
+    relay = _relay()
+
+    async def run():
+        relay.start()
+        await relay.on_audio_data(b"one")
+        # Let the sender take the chunk and start waiting for more
+        await asyncio.sleep(0)
+        assert relay.queue.empty()
+        await relay.on_audio_data(b"two")
+        await relay.close()
+
+    asyncio.run(run())
+
+    assert relay.client_websocket.frames == [b"onetwo"]
@@ -0,0 +1,89 @@
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from services.frame_extractor import FrameExtractor
+
+
+@pytest.fixture
+def extractor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # screenshots/ is created in the working directory
+    extractor = FrameExtractor(frame_diff_threshold=0.2, frame_diff_low=0.1)
+    yield extractor
+    asyncio.run(extractor.cleanup())
+
+
+def _thumbnail(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (72, 128), dtype=np.uint8)
+
+
+def test_small_drift_from_the_anchor_is_ignored(extractor):
+    anchor = _thumbnail(1)
+    current = anchor.copy()
+    current[0, :8] = 0
+
+    assert extractor.drift_from_anchor(anchor, current) is None
+
+
+def test_large_change_from_the_anchor_returns_that_difference(extractor):
+    anchor, current = _thumbnail(1), _thumbnail(2)
+
+    drift = extractor.drift_from_anchor(anchor, current)
+
+    assert drift == pytest.approx(extractor.compare_thumbnails(anchor, current))
+    assert drift > extractor.frame_diff_threshold
+
+
+def test_gradual_change_adds_up_to_drift_from_the_anchor(extractor):
+    anchor, previous = _thumbnail(1), _thumbnail(2)
+    # Barely different from the last poll, but far from what Gemini last analyzed
+    current = previous.copy()
+    current[0, :8] = 0
+    assert extractor.compare_thumbnails(previous, current) < extractor.frame_diff_low
+
+    drift = extractor.drift_from_anchor(anchor, current)
+
+    assert drift == pytest.approx(extractor.compare_thumbnails(anchor, current))
+    assert drift > extractor.frame_diff_threshold
+
+
+def test_undecodable_thumbnail_counts_as_a_change(extractor):
+    anchor = _thumbnail(1)
+
+    assert extractor.drift_from_anchor(anchor, None) == 1.0
+
+
+def _solid_video(extractor: FrameExtractor, path, color: str) -> str:
+    subprocess.run(
+        [
+            extractor.ffmpeg_path, "-f", "lavfi", "-i", f"color=c={color}:s=64x64:d=3",
+            "-pix_fmt", "yuv420p", "-y", str(path),
+        ],
+        check=True,
+        capture_output=True
+    )
+    return str(path)
+
+
+def test_concurrent_direct_extracts_at_same_timestamp_stay_separate(extractor, tmp_path):
+    # Several ffmpeg calls in flight at once, as on a multi-core server
+    extractor._executor.shutdown()
+    extractor._executor = ThreadPoolExecutor(max_workers=8)
+    red = _solid_video(extractor, tmp_path / "red.mp4", "red")
+    blue = _solid_video(extractor, tmp_path / "blue.mp4", "blue")
+
+    async def run():
+        return await asyncio.gather(*(
+            extractor._extract_frame_direct(source, 1)
+            for source in [red, blue] * 16
+        ))
+
+    frames = asyncio.run(run())
+
+    for source, frame_bytes in zip([red, blue] * 16, frames):
+        b, g, r = cv2.imdecode(np.frombuffer(frame_bytes, np.uint8), cv2.IMREAD_COLOR).mean(axis=(0, 1))
+        assert (r > b) if source == red else (b > r)
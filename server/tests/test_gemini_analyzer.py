@@ -0,0 +1,206 @@
+import asyncio
+import io
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.composition_context import CompositionContext
+from services.gemini_analyzer import GeminiAnalyzer
+
+
+def _jpeg(seed: int) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _pair_index(old_image: Image.Image) -> int:
+    """Which _submit_pairs pair an image came from (requests may queue in any order)."""
+    for i in range(8):
+        if Image.open(io.BytesIO(_jpeg(2 * i))).tobytes() == old_image.tobytes():
+            return i
+    raise AssertionError("unknown frame")
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    return GeminiAnalyzer()
+
+
+@pytest.fixture
+def gemini(analyzer, monkeypatch):
+    """Record the single and batched delta requests the batcher makes."""
+    calls = {"single": [], "batch": [], "batch_error": None, "batch_skips": set()}
+
+    async def request_delta(old_image, new_image, prompt):
+        calls["single"].append(_pair_index(old_image))
+        return f"single {_pair_index(old_image)}"
+
+    async def request_delta_batch(pairs):
+        calls["batch"].append(len(pairs))
+        if calls["batch_error"]:
+            raise calls["batch_error"]
+        return [
+            None if _pair_index(old_image) in calls["batch_skips"] else f"batched {_pair_index(old_image)}"
+            for old_image, _new_image, _prompt in pairs
+        ]
+
+    monkeypatch.setattr(analyzer, "_request_delta", request_delta)
+    monkeypatch.setattr(analyzer, "_request_delta_batch", request_delta_batch)
+    return calls
+
+
+def _submit_pairs(analyzer, count: int):
+    async def run():
+        try:
+            return await asyncio.gather(*(
+                analyzer.batcher.submit(_jpeg(2 * i), _jpeg(2 * i + 1), CompositionContext("video"))
+                for i in range(count)
+            ))
+        finally:
+            await analyzer.close()
+
+    return [result["analysis"] for result in asyncio.run(run())]
+
+
+def test_concurrent_requests_share_one_batched_call(analyzer, gemini):
+    analyses = _submit_pairs(analyzer, 3)
+
+    assert gemini["batch"] == [3]
+    assert gemini["single"] == []
+    assert analyses == ["batched 0", "batched 1", "batched 2"]
+
+
+def test_pairs_missing_from_the_batched_answer_are_sent_alone(analyzer, gemini):
+    gemini["batch_skips"] = {1}
+
+    analyses = _submit_pairs(analyzer, 3)
+
+    assert gemini["batch"] == [3]
+    assert gemini["single"] == [1]
+    assert analyses == ["batched 0", "single 1", "batched 2"]
+
+
+def test_failed_batch_falls_back_to_single_requests(analyzer, gemini):
+    gemini["batch_error"] = RuntimeError("quota")
+
+    analyses = _submit_pairs(analyzer, 2)
+
+    assert gemini["batch"] == [2]
+    assert analyses == ["single 0", "single 1"]
+
+
+def test_lone_request_is_not_batched(analyzer, gemini):
+    analyses = _submit_pairs(analyzer, 1)
+
+    assert gemini["batch"] == []
+    assert analyses == ["single 0"]
+
+
+def test_lone_request_does_not_wait_for_the_window(analyzer, gemini):
+    analyzer.batcher.window = 30
+
+    async def run():
+        try:
+            return await asyncio.wait_for(
+                analyzer.batcher.submit(_jpeg(0), _jpeg(1), CompositionContext("video")), timeout=5
+            )
+        finally:
+            await analyzer.close()
+
+    assert asyncio.run(run())["analysis"] == "single 0"
+
+
+def test_close_cancels_callers_of_in_flight_batches(analyzer, monkeypatch):
+    started = None
+
+    async def request_delta(old_image, new_image, prompt):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(analyzer, "_request_delta", request_delta)
+
+    async def run():
+        nonlocal started
+        started = asyncio.Event()
+        caller = asyncio.create_task(
+            analyzer.batcher.submit(_jpeg(0), _jpeg(1), CompositionContext("video"))
+        )
+        await started.wait()
+        await analyzer.close()
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(caller, timeout=5)
+
+    asyncio.run(run())
+
+
+def test_batch_size_is_capped(analyzer, gemini):
+    analyzer.batcher.max_batch = 2
+
+    _submit_pairs(analyzer, 5)
+
+    assert sorted(gemini["batch"]) == [2, 2]
+    assert len(gemini["single"]) == 1
+
+
+def test_prepare_delta_hashes_and_looks_up_off_the_event_loop(analyzer, monkeypatch):
+    hashed_on = []
+    frame_hash = analyzer._frame_hash
+
+    def recording_hash(image):
+        hashed_on.append(threading.current_thread())
+        return frame_hash(image)
+
+    monkeypatch.setattr(analyzer, "_frame_hash", recording_hash)
+    cached_delta = analyzer._cached_delta
+
+    def recording_lookup(cache_key):
+        hashed_on.append(threading.current_thread())
+        return cached_delta(cache_key)
+
+    monkeypatch.setattr(analyzer, "_cached_delta", recording_lookup)
+
+    async def run():
+        return await analyzer._prepare_delta(_jpeg(1), _jpeg(2), CompositionContext("video"))
+
+    old_image, new_image, cache_key, cached = asyncio.run(run())
+
+    assert cached is None
+    assert len(hashed_on) == 3
+    assert threading.main_thread() not in hashed_on
+    assert old_image.size == new_image.size == (64, 64)
+    assert cache_key[2] == analyzer._delta_context_key(CompositionContext("video"))
+
+
+def test_delta_cache_matches_near_identical_pairs_only(analyzer):
+    context = analyzer._delta_context_key(CompositionContext("video"))
+    old_hash, new_hash = 0x0123456789ABCDEF, 0xFEDCBA9876543210
+    analyzer._store_delta((old_hash, new_hash, context), {"analysis": "cut to the crowd", "needs_change": True})
+
+    # Four flipped bits, one in each of four different bands of the previous frame's hash
+    near = old_hash ^ (1 << 0) ^ (1 << 14) ^ (1 << 28) ^ (1 << 42)
+    assert analyzer._cached_delta((near, new_hash, context))["analysis"] == "cut to the crowd"
+    assert analyzer._cached_delta((near ^ (1 << 60), new_hash, context)) is None
+    assert analyzer._cached_delta((old_hash, new_hash ^ 0b11111, context)) is None
+    other_context = analyzer._delta_context_key(CompositionContext("another video"))
+    assert analyzer._cached_delta((old_hash, new_hash, other_context)) is None
+    assert (analyzer.delta_cache_hits, analyzer.delta_cache_misses) == (1, 3)
+
+
+def test_delta_cache_eviction_drops_index_entries(analyzer, monkeypatch):
+    monkeypatch.setattr("services.gemini_analyzer.DELTA_CACHE_SIZE", 2)
+    context = analyzer._delta_context_key(CompositionContext("video"))
+    # Hashes at least 32 bits apart from each other
+    hashes = [0, 0xFFFFFFFF00000000, 0x00000000FFFFFFFF]
+    for old_hash in hashes:
+        analyzer._store_delta((old_hash, 0, context), {"analysis": hex(old_hash)})
+
+    assert analyzer._cached_delta((hashes[0], 0, context)) is None
+    assert analyzer._cached_delta((hashes[2], 0, context))["analysis"] == hex(hashes[2])
+    indexed = set().union(*analyzer._delta_index.values())
+    assert indexed == set(analyzer._delta_cache)
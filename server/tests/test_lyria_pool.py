@@ -0,0 +1,229 @@
+import asyncio
+import contextlib
+
+import orjson
+import pytest
+import websockets
+from websockets.asyncio.server import serve
+
+from services.lyria_pool import LyriaConnection, LyriaConnectionPool
+
+
+async def _fake_lyria(websocket):
+    """Minimal Lyria endpoint: confirm setup, then hold the socket open."""
+    await websocket.recv()
+    await websocket.send(orjson.dumps({"setupComplete": {}}).decode())
+    with contextlib.suppress(Exception):
+        async for _ in websocket:
+            pass
+
+
+@pytest.fixture
+def local_lyria(monkeypatch):
+    """Point the pool's websockets.connect at a local fake Lyria endpoint."""
+    @contextlib.asynccontextmanager
+    async def pool(size: int):
+        async with serve(_fake_lyria, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            connect = websockets.connect
+            monkeypatch.setattr(websockets, "connect", lambda _url, **kwargs: connect(url, **kwargs))
+
+            pool = LyriaConnectionPool(pool_size=size, api_key="test-key")
+            await pool.initialize()
+            try:
+                yield pool
+            finally:
+                await pool.shutdown()
+
+    return pool
+
+
+class _RecordingWebSocket:
+    """Stand-in socket that records every outgoing message."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(orjson.loads(message))
+
+
+def _prompt_texts(ws):
+    return [m["client_content"]["weightedPrompts"][0]["text"] for m in ws.sent]
+
+
+def test_prompt_burst_is_coalesced_into_latest_send():
+    async def run():
+        connection = LyriaConnection("conn-1", "ws://unused")
+        connection.ws = ws = _RecordingWebSocket()
+
+        for text in ("calm piano", "upbeat piano", "driving drums"):
+            await connection.update_prompt(text, weight=0.5)
+        assert ws.sent == []
+
+        await connection._flush_task
+
+        assert _prompt_texts(ws) == ["driving drums"]
+        assert ws.sent[0]["client_content"]["weightedPrompts"][0]["weight"] == 0.5
+
+    asyncio.run(run())
+
+
+def test_prompt_updates_in_separate_windows_are_sent_separately():
+    async def run():
+        connection = LyriaConnection("conn-1", "ws://unused")
+        connection.ws = ws = _RecordingWebSocket()
+
+        await connection.update_prompt("calm piano")
+        await connection._flush_task
+        await connection.update_prompt("driving drums")
+        await connection._flush_task
+
+        assert _prompt_texts(ws) == ["calm piano", "driving drums"]
+
+    asyncio.run(run())
+
+
+def test_acquire_takes_warm_connection(local_lyria):
+    async def run():
+        async with local_lyria(1) as pool:
+            warm = pool._ready[0]
+
+            connection = await pool.acquire_connection("session-1")
+
+            assert connection is warm
+            assert pool.get_connection("session-1") is connection
+            assert pool._count_available() == 0
+
+    asyncio.run(run())
+
+
+def test_dropped_idle_connection_is_replaced(local_lyria):
+    async def run():
+        async with local_lyria(1) as pool:
+            dropped = pool._ready[0]
+            watchers = list(pool._watchers)
+
+            await dropped.ws.close()
+            await asyncio.gather(*watchers)
+            await asyncio.gather(*pool._bg_tasks)
+
+            assert dropped.status == "closed"
+            assert dropped not in pool.pool
+            assert len(pool._ready) == 1
+            assert pool._ready[0] is not dropped
+            assert pool._ready[0].status == "ready"
+
+    asyncio.run(run())
+
+
+def test_acquire_evicts_stale_connections(local_lyria):
+    async def run():
+        async with local_lyria(2) as pool:
+            stale, healthy = pool._ready
+            stale.status = "error"
+
+            connection = await pool.acquire_connection("session-1")
+            await asyncio.gather(*pool._closing)
+
+            assert connection is healthy
+            assert stale not in pool.pool
+            assert stale.status == "closed"
+            assert stale.ws.state.name == "CLOSED"
+
+    asyncio.run(run())
+
+
+def test_ensure_warm_counts_pending_creations_and_respects_max_size(local_lyria):
+    async def run():
+        async with local_lyria(1) as pool:
+            pool.max_size = 3
+
+            assert pool.ensure_warm(5) == 2
+            # The two creations are still in flight, so there's no room left
+            assert pool.ensure_warm(5) == 0
+
+            await asyncio.gather(*pool._bg_tasks)
+
+            assert len(pool._ready) == 3
+            assert pool.ensure_warm(2) == 0
+
+    asyncio.run(run())
+
+
+def test_ensure_warm_tops_up_after_acquire(local_lyria):
+    async def run():
+        async with local_lyria(2) as pool:
+            pool.max_size = 4
+            await pool.acquire_connection("session-1")
+
+            # One ready, one in use: two more fit, but only one is wanted
+            assert pool.ensure_warm(2) == 1
+            await asyncio.gather(*pool._bg_tasks)
+
+            assert len(pool._ready) == 2
+            assert len(pool.pool) == 3
+
+    asyncio.run(run())
+
+
+def test_ensure_warm_is_a_no_op_before_initialize():
+    pool = LyriaConnectionPool(pool_size=1, api_key="test-key")
+
+    assert pool.ensure_warm(4) == 0
+    assert pool._bg_tasks == set()
+
+
+def test_failed_reconnect_on_release_evicts_and_replaces(local_lyria):
+    async def run():
+        async with local_lyria(1) as pool:
+            connection = await pool.acquire_connection("session-1")
+
+            async def refuse():
+                raise OSError("connection refused")
+
+            connection.connect = refuse
+            await pool.release_connection("session-1")
+            await asyncio.gather(*pool._closing, *pool._bg_tasks)
+
+            assert pool.get_connection("session-1") is None
+            assert connection not in pool.pool
+            assert connection.status == "closed"
+            assert len(pool._ready) == 1
+            assert pool._ready[0] is not connection
+
+    asyncio.run(run())
+
+
+def test_initialize_gives_up_on_connects_after_the_timeout(monkeypatch):
+    async def silent_lyria(websocket):
+        # Accept the socket but never confirm setup
+        await websocket.wait_closed()
+
+    async def run():
+        async with serve(silent_lyria, "127.0.0.1", 0) as server:
+            url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+            connect = websockets.connect
+            monkeypatch.setattr(websockets, "connect", lambda _url, **kwargs: connect(url, **kwargs))
+
+            pool = LyriaConnectionPool(pool_size=2, api_key="test-key", timeout=0.2)
+            await asyncio.wait_for(pool.initialize(), timeout=5)
+
+            assert pool.is_initialized
+            assert pool.pool == []
+            await pool.shutdown()
+
+    asyncio.run(run())
+
+
+def test_shutdown_cancels_background_work_after_the_timeout():
+    async def run():
+        pool = LyriaConnectionPool(pool_size=1, api_key="test-key", timeout=0.2)
+        stuck = asyncio.create_task(asyncio.Event().wait())
+        pool._bg_tasks.add(stuck)
+
+        await asyncio.wait_for(pool.shutdown(), timeout=5)
+
+        assert stuck.cancelled()
+
+    asyncio.run(run())
@@ -0,0 +1,235 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.composition_context import CompositionContext
+from services.orchestrator import PROMPT_SKIP_SIMILARITY, MusicGenerationOrchestrator, _prompt_similarity
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # screenshots/ is created in the working directory
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    orchestrator = MusicGenerationOrchestrator()
+    # Keep initialize() off the network; the orchestrator's own startup logic still runs
+    monkeypatch.setattr(orchestrator.lyria_pool, "initialize", _noop)
+    monkeypatch.setattr(orchestrator.frame_extractor, "initialize", _noop)
+    monkeypatch.setattr(orchestrator.gemini_analyzer, "warmup", _noop)
+    yield orchestrator
+    orchestrator._cpu_executor.shutdown(wait=False)
+    asyncio.run(orchestrator.frame_extractor.cleanup())
+
+
+def test_initialize_prewarms_configured_videos(orchestrator, monkeypatch):
+    monkeypatch.setenv("PREWARM_VIDEO_URLS", "https://a.example/1, https://b.example/2")
+    prewarmed = []
+
+    async def prewarm_video(url):
+        prewarmed.append(url)
+        if url.endswith("/2"):
+            raise RuntimeError("lookup failed")
+
+    monkeypatch.setattr(orchestrator, "prewarm_video", prewarm_video)
+
+    async def run():
+        await orchestrator.initialize()
+        await orchestrator._prewarm_videos_task
+        orchestrator._prewarm_task.cancel()
+
+    asyncio.run(run())
+
+    assert orchestrator.is_initialized
+    assert sorted(prewarmed) == ["https://a.example/1", "https://b.example/2"]
+
+
+def test_backoff_threshold_grows_after_repeated_no_change_analyses(orchestrator):
+    orchestrator.frame_extractor.frame_diff_threshold = 0.2
+
+    thresholds = [orchestrator._backoff_threshold(streak) for streak in range(6)]
+
+    assert thresholds[:2] == [0.2, 0.2]
+    assert thresholds[2] == pytest.approx(0.3)
+    assert thresholds[3] == pytest.approx(0.45)
+    assert thresholds[4:] == [0.5, 0.5]
+
+
+def test_backoff_threshold_never_drops_below_the_configured_one(orchestrator):
+    orchestrator.frame_extractor.frame_diff_threshold = 0.6
+
+    assert orchestrator._backoff_threshold(10) == 0.6
+
+
+def test_prompt_similarity_ignores_case_punctuation_and_order():
+    assert _prompt_similarity("Calm piano, soft strings", "soft strings. calm PIANO") == pytest.approx(1.0)
+
+
+def test_prompt_similarity_weighs_word_counts():
+    assert _prompt_similarity("calm piano", "loud drums") == 0.0
+    assert _prompt_similarity("piano piano drums", "piano drums") == pytest.approx(3 / (5 ** 0.5 * 2 ** 0.5))
+    assert _prompt_similarity("", "calm piano") == 0.0
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.prompts = []
+
+    async def update_prompt(self, prompt):
+        self.prompts.append(prompt)
+
+
+class _NullSessionLogger:
+    def log_event(self, event):
+        pass
+
+    def log_prompt_update(self, prompt):
+        pass
+
+    def log_frame_analysis(self, frame_number, kind, analysis):
+        pass
+
+
+def test_update_prompt_skips_near_identical_scene_prompts(orchestrator):
+    session = SimpleNamespace(
+        session_id="session-1",
+        last_prompt=None,
+        lyria_connection=_RecordingConnection(),
+        session_logger=_NullSessionLogger(),
+    )
+    base = " ".join(f"word{i}" for i in range(40))
+    reworded = base + " word0"
+    assert _prompt_similarity(base, reworded) >= PROMPT_SKIP_SIMILARITY
+
+    async def run():
+        return [
+            await orchestrator._update_prompt(session, base, skip_similar=True),
+            await orchestrator._update_prompt(session, reworded, skip_similar=True),
+            await orchestrator._update_prompt(session, "loud drums", skip_similar=True),
+            await orchestrator._update_prompt(session, "loud drums"),
+        ]
+
+    assert asyncio.run(run()) == [True, False, True, True]
+    assert session.lyria_connection.prompts == [base, "loud drums", "loud drums"]
+
+
+class _FailingConnection:
+    on_audio_data = None
+
+    async def start(self, prompt):
+        raise RuntimeError("setup rejected")
+
+
+def test_failed_lyria_start_releases_the_connection_without_a_session_log(orchestrator, tmp_path, monkeypatch):
+    released = []
+
+    async def get_video_info(url):
+        return {"title": "Test video", "is_live": False, "duration": 60}
+
+    async def acquire_connection(session_id):
+        return _FailingConnection()
+
+    async def release_connection(session_id):
+        released.append(session_id)
+
+    async def get_metadata_prompt(video_info):
+        return "calm piano"
+
+    monkeypatch.setattr(orchestrator.frame_extractor, "get_video_info", get_video_info)
+    monkeypatch.setattr(orchestrator.lyria_pool, "acquire_connection", acquire_connection)
+    monkeypatch.setattr(orchestrator.lyria_pool, "release_connection", release_connection)
+    monkeypatch.setattr(orchestrator, "_get_metadata_prompt", get_metadata_prompt)
+    orchestrator.is_initialized = True
+
+    with pytest.raises(RuntimeError, match="setup rejected"):
+        asyncio.run(orchestrator.start_music_generation("session-1", "https://a.example/1", object()))
+
+    assert released == ["session-1"]
+    assert "session-1" not in orchestrator.active_sessions
+    assert not (tmp_path / "logs").exists()
+
+
+def test_shutdown_stops_session_connections_without_releasing_them(orchestrator, monkeypatch):
+    calls = []
+
+    class _Connection:
+        async def stop(self):
+            calls.append("stop")
+
+    class _Closeable:
+        def log_session_end(self, summary):
+            pass
+
+        async def close(self):
+            pass
+
+    async def release_connection(session_id):
+        calls.append("release")
+
+    monkeypatch.setattr(orchestrator.lyria_pool, "release_connection", release_connection)
+    monkeypatch.setattr(orchestrator.gemini_analyzer, "close", _noop)
+    orchestrator.active_sessions["session-1"] = SimpleNamespace(
+        session_id="session-1",
+        is_active=True,
+        scrub_event=asyncio.Event(),
+        started_monotonic_ns=0,
+        session_logger=_Closeable(),
+        audio_relay=_Closeable(),
+        lyria_connection=_Connection(),
+        frames_task=None,
+    )
+
+    asyncio.run(orchestrator.shutdown())
+
+    assert calls == ["stop"]
+    assert orchestrator.active_sessions == {}
+
+
+def test_livestream_peeks_and_only_grabs_full_frames_on_a_change(orchestrator, monkeypatch):
+    still, moved = (np.random.default_rng(seed).integers(0, 256, (64, 64), dtype=np.uint8) for seed in (1, 2))
+    # The last peek fails, so that poll falls back to a full grab
+    peeks = [still, still.copy(), moved, None]
+    grabs, deltas = [], []
+    session = SimpleNamespace(
+        session_id="session-1",
+        video_url="https://a.example/live",
+        is_active=True,
+        last_prompt=None,
+        composition_context=CompositionContext("live"),
+        session_logger=_NullSessionLogger(),
+        lyria_connection=_RecordingConnection(),
+        frame_session=orchestrator.frame_extractor.open("https://a.example/live"),
+    )
+
+    async def peek_livestream(url):
+        peek = peeks.pop(0)
+        session.is_active = bool(peeks)
+        return peek
+
+    async def extract_livestream_frame(url):
+        grabs.append(f"frame-{len(grabs) + 1}")
+        return grabs[-1]
+
+    async def analyze_frame(frame, context):
+        return {"composition_notes": "calm piano"}
+
+    async def submit_delta(old_frame, new_frame, context):
+        deltas.append((old_frame, new_frame))
+        return {"analysis": "same scene", "needs_change": False}
+
+    monkeypatch.setattr(orchestrator.frame_extractor, "livestream_interval", 0)
+    monkeypatch.setattr(orchestrator.frame_extractor, "peek_livestream", peek_livestream)
+    monkeypatch.setattr(orchestrator.frame_extractor, "extract_livestream_frame", extract_livestream_frame)
+    monkeypatch.setattr(orchestrator.frame_extractor, "make_thumbnail", lambda frame: moved.copy())
+    monkeypatch.setattr(orchestrator.gemini_analyzer, "analyze_frame", analyze_frame)
+    monkeypatch.setattr(orchestrator.gemini_analyzer, "submit_delta", submit_delta)
+
+    asyncio.run(orchestrator._process_livestream(session))
+
+    # Initial frame, the change, and the fallback grab for the failed peek
+    assert grabs == ["frame-1", "frame-2", "frame-3"]
+    assert deltas == [("frame-1", "frame-2")]
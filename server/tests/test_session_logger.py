@@ -0,0 +1,60 @@
+import asyncio
+
+from services.session_logger import LOG_QUEUE_MAX_ENTRIES, SessionLogger
+
+
+def _read(logger: SessionLogger) -> str:
+    with open(logger.log_file, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_entries_past_the_queue_limit_are_dropped(tmp_path):
+    async def run():
+        logger = SessionLogger("session-1", log_dir=str(tmp_path))
+        # The writer can't run between these calls, so the queue fills up
+        for i in range(LOG_QUEUE_MAX_ENTRIES + 5):
+            logger.log_event(f"event {i}")
+        await logger.close()
+        return logger
+
+    logger = asyncio.run(run())
+    contents = _read(logger)
+
+    assert logger.dropped_entries == 5
+    assert f"EVENT: event {LOG_QUEUE_MAX_ENTRIES - 1}\n" in contents
+    assert f"EVENT: event {LOG_QUEUE_MAX_ENTRIES}\n" not in contents
+
+
+def test_close_flushes_queued_entries_and_is_idempotent(tmp_path):
+    async def run():
+        logger = SessionLogger("session-1", log_dir=str(tmp_path))
+        logger.log_event("first")
+        logger.log_prompt_update("calm piano")
+        await logger.close()
+        await logger.close()
+        return logger
+
+    logger = asyncio.run(run())
+
+    assert not logger._finalizer.alive
+    assert "EVENT: first" in _read(logger)
+    assert "calm piano" in _read(logger)
+
+
+def test_entries_logged_after_close_are_still_written(tmp_path):
+    async def run():
+        logger = SessionLogger("session-1", log_dir=str(tmp_path))
+        await logger.close()
+        logger.log_event("late")
+        return logger
+
+    assert "EVENT: late" in _read(asyncio.run(run()))
+
+
+def test_logger_outside_an_event_loop_writes_directly(tmp_path):
+    logger = SessionLogger("session-1", log_dir=str(tmp_path))
+
+    logger.log_event("sync")
+
+    assert "EVENT: sync" in _read(logger)
+    asyncio.run(logger.close())